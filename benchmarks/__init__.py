@@ -0,0 +1,10 @@
+"""
+Benchmarks for the Joint Movie Recommender
+
+data_generator builds reproducible MovieLens-scale synthetic datasets and
+run measures build cost and per-method latency on them:
+
+    python -m benchmarks.run --scale 1m --output results/1m.json
+"""
+
+from benchmarks.data_generator import SCALES, generate_dataset
@@ -0,0 +1,134 @@
+"""
+Synthetic MovieLens-like ratings and movies
+
+User activity and movie popularity both follow power laws (a few heavy
+raters and blockbusters, long tails of both), ratings are half stars driven
+by a user bias, a movie quality and a genre-taste match, so the collaborative
+scorers see realistic neighbourhood structure. Everything is drawn from one
+seeded generator, so a (scale, seed) pair always gives the same data.
+"""
+
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Ratings, users and movies of the MovieLens releases each scale mimics
+SCALES: Dict[str, Dict[str, int]] = {
+    '100k': {'n_ratings': 100_836, 'n_users': 610, 'n_movies': 9_742},
+    '1m': {'n_ratings': 1_000_209, 'n_users': 6_040, 'n_movies': 3_706},
+    '25m': {'n_ratings': 25_000_095, 'n_users': 162_541, 'n_movies': 62_423},
+}
+
+GENRES = ('Action', 'Adventure', 'Animation', 'Children', 'Comedy', 'Crime', 'Documentary', 'Drama',
+          'Fantasy', 'Film-Noir', 'Horror', 'IMAX', 'Musical', 'Mystery', 'Romance', 'Sci-Fi',
+          'Thriller', 'War', 'Western')
+
+MAX_USER_SHARE = 0.1  # Heaviest raters cover at most this share of the catalog
+FIRST_TIMESTAMP = 788_918_400  # 1995-01-01
+LAST_TIMESTAMP = 1_577_836_800  # 2020-01-01
+
+
+def _power_law_weights(n: int, exponent: float, rng: np.random.Generator) -> np.ndarray:
+    """Normalized rank^-exponent weights assigned to n items in random order"""
+    weights = np.arange(1, n + 1, dtype=np.float64) ** -exponent
+    return rng.permutation(weights / weights.sum())
+
+
+def _capped_weights(weights: np.ndarray, cap: float) -> np.ndarray:
+    """Clip weights at cap and spread the excess over the rest, keeping the sum at 1"""
+    for _ in range(20):
+        over = weights > cap
+        if not over.any():
+            break
+        excess = (weights[over] - cap).sum()
+        weights = np.where(over, cap, weights)
+        weights[~over] += excess * weights[~over] / weights[~over].sum()
+    return weights
+
+
+def generate_movies(n_movies: int, rng: np.random.Generator) -> Tuple[pd.DataFrame, np.ndarray]:
+    """
+    Movies with 1-3 genres (skewed towards Drama/Comedy) and a release year
+
+    Returns:
+        Tuple[pd.DataFrame, np.ndarray]: Movies frame and its movies x genres indicator matrix
+    """
+    genre_weights = _power_law_weights(len(GENRES), 0.8, rng)
+    genre_count = rng.choice([1, 2, 3], size=n_movies, p=[0.4, 0.4, 0.2])
+    # Gumbel top-k: the genre_count largest perturbed log-weights are a weighted sample without replacement
+    keys = np.log(genre_weights) + rng.gumbel(size=(n_movies, len(GENRES)))
+    ranks = np.argsort(np.argsort(-keys, axis=1), axis=1)
+    has_genre = ranks < genre_count[:, None]
+
+    genre_names = np.array(GENRES, dtype=object)
+    genres = ['|'.join(genre_names[row]) for row in has_genre]
+    movies = pd.DataFrame({
+        'movie_id': np.arange(1, n_movies + 1),
+        'title': [f"Synthetic Movie {i}" for i in range(1, n_movies + 1)],
+        'genres': genres,
+        'year': np.clip(np.round(rng.normal(1995, 18, n_movies)), 1920, 2020).astype(np.int64)
+    })
+    return movies, has_genre
+
+
+def generate_dataset(scale: str = '100k', seed: int = 42, n_ratings: int = None,
+                     n_users: int = None, n_movies: int = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Generate a reproducible synthetic ratings/movies pair
+
+    Args:
+        scale (str): Preset from SCALES ('100k', '1m', '25m')
+        seed (int): Random seed
+        n_ratings, n_users, n_movies (int): Override the preset sizes
+
+    Returns:
+        Tuple[pd.DataFrame, pd.DataFrame]: ratings (user_id, movie_id, rating, timestamp)
+            and movies (movie_id, title, genres, year)
+    """
+    if scale not in SCALES:
+        raise ValueError(f"Unknown scale '{scale}', expected one of {tuple(SCALES)}")
+    sizes = dict(SCALES[scale])
+    for name, value in (('n_ratings', n_ratings), ('n_users', n_users), ('n_movies', n_movies)):
+        if value is not None:
+            sizes[name] = value
+
+    rng = np.random.default_rng(seed)
+    movies, has_genre = generate_movies(sizes['n_movies'], rng)
+
+    # Oversample (user, movie) draws, then drop repeats down to the target count
+    target = min(sizes['n_ratings'], sizes['n_users'] * sizes['n_movies'] // 10)
+    user_weights = _capped_weights(_power_law_weights(sizes['n_users'], 0.9, rng),
+                                   MAX_USER_SHARE * sizes['n_movies'] / target)
+    movie_weights = _power_law_weights(sizes['n_movies'], 1.0, rng)
+    keys = np.empty(0, dtype=np.int64)
+    oversample = 1.3
+    while len(keys) < target:
+        draws = int((target - len(keys)) * oversample) + 1000
+        oversample *= 2  # Later rounds mostly hit pairs we already have
+        users = rng.choice(sizes['n_users'], size=draws, p=user_weights)
+        items = rng.choice(sizes['n_movies'], size=draws, p=movie_weights)
+        keys = np.sort(np.concatenate([keys, users.astype(np.int64) * sizes['n_movies'] + items]))
+        keys = keys[np.concatenate([[True], keys[1:] != keys[:-1]])]
+    keys = rng.choice(keys, size=target, replace=False)
+    users, items = keys // sizes['n_movies'], keys % sizes['n_movies']
+
+    # Rating = 3.5 + user bias + movie quality + how well the movie's genres match the user's taste
+    user_bias = rng.normal(0, 0.4, sizes['n_users'])
+    movie_quality = rng.normal(0, 0.5, sizes['n_movies'])
+    user_taste = rng.normal(0, 1, (sizes['n_users'], len(GENRES)))
+    genre_counts = has_genre.sum(axis=1)
+    taste_match = np.zeros(target)
+    for genre in range(len(GENRES)):
+        taste_match += user_taste[users, genre] * has_genre[items, genre]
+    taste_match /= genre_counts[items]
+    raw = 3.5 + user_bias[users] + movie_quality[items] + 0.6 * taste_match + rng.normal(0, 0.6, target)
+
+    order = np.argsort(keys, kind='stable')
+    ratings = pd.DataFrame({
+        'user_id': users[order] + 1,
+        'movie_id': items[order] + 1,
+        'rating': np.clip(np.round(raw[order] * 2) / 2, 0.5, 5.0),
+        'timestamp': rng.integers(FIRST_TIMESTAMP, LAST_TIMESTAMP, target)
+    })
+    return ratings, movies
@@ -0,0 +1,329 @@
+"""
+Benchmark JointMovieRecommender on synthetic MovieLens-scale data
+
+Measures build time and peak memory of the constructor, then latency
+(mean/p50/p99) and throughput of every public method over a fixed sample of
+users and the recall/latency of the IVF neighbour index against exact search,
+and writes one JSON document per run for regression tracking:
+
+    python -m benchmarks.run --scale 100k
+    python -m benchmarks.run --scale 1m --engine nmf --output results/1m-nmf.json
+    python -m benchmarks.run --scale 1m --scaling  # n_jobs 1, 2, 4, ... up to the core count
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from benchmarks.data_generator import SCALES, generate_dataset  # noqa: E402
+from joint_recommender import JointMovieRecommender, UserNeighbourIndex  # noqa: E402
+
+
+def _max_rss_mb() -> float:
+    """Peak resident set size of this process so far (ru_maxrss is KB on Linux, bytes on macOS)"""
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss / (1024 * 1024) if sys.platform == 'darwin' else max_rss / 1024
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        return ''
+
+
+def time_calls(function: Callable, calls: List[tuple], setup: Callable = None, items_per_call: int = 1) -> Dict:
+    """
+    Time function(*args) for every args tuple in calls
+
+    Args:
+        function (Callable): Method under test
+        calls (List[tuple]): Positional arguments, one tuple per call
+        setup (Callable): Run untimed before every call (e.g. clearing caches)
+        items_per_call (int): Work items per call (users, couples, ...) for throughput
+
+    Returns:
+        Dict: calls, mean/p50/p99/max latency in ms and items per second
+    """
+    latencies = []
+    for args in calls:
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        function(*args)
+        latencies.append(time.perf_counter() - start)
+    latencies = np.array(latencies) * 1000
+    return {
+        'calls': len(latencies),
+        'mean_ms': round(float(latencies.mean()), 3),
+        'p50_ms': round(float(np.percentile(latencies, 50)), 3),
+        'p99_ms': round(float(np.percentile(latencies, 99)), 3),
+        'max_ms': round(float(latencies.max()), 3),
+        'throughput_per_s': round(items_per_call * len(latencies) / (latencies.sum() / 1000), 2)
+    }
+
+
+def build_recommender(ratings: pd.DataFrame, movies: pd.DataFrame, **options) -> Dict:
+    """
+    Construct a recommender, returning it with build time and peak memory
+
+    Peak memory comes from a separate build under tracemalloc, whose allocation
+    hooks would otherwise inflate the timed build.
+    """
+    tracemalloc.start()
+    JointMovieRecommender(ratings, movies, **options).close()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    gc.collect()
+
+    start = time.perf_counter()
+    recommender = JointMovieRecommender(ratings, movies, **options)
+    build_seconds = time.perf_counter() - start
+    return {
+        'recommender': recommender,
+        'build_seconds': round(build_seconds, 3),
+        'build_peak_traced_mb': round(peak / (1024 * 1024), 1),
+        'max_rss_mb': round(_max_rss_mb(), 1)
+    }
+
+
+def benchmark_methods(recommender: JointMovieRecommender, ratings: pd.DataFrame,
+                      n_calls: int = 20, seed: int = 0) -> Dict[str, Dict]:
+    """Latency/throughput of each public method over a fixed sample of active users"""
+    rng = np.random.default_rng(seed)
+    activity = ratings['user_id'].value_counts()
+    users = rng.choice(activity.index[activity >= 20].to_numpy(), size=n_calls * 6)
+    singles = [(int(user),) for user in users[:n_calls]]
+    pairs = [(int(a), int(b)) for a, b in users[:2 * n_calls].reshape(-1, 2)]
+    groups = [[int(user) for user in group] for group in users[:5 * n_calls].reshape(-1, 5)]
+    popular_movies = ratings['movie_id'].value_counts().index[:n_calls].to_numpy()
+    clear_cache = recommender.invalidate_cache
+
+    results = {
+        'get_user_profile': time_calls(recommender.get_user_profile, singles),
+        'get_user_profiles': time_calls(recommender.get_user_profiles, [([g for g in group],) for group in groups],
+                                        items_per_call=5),
+        'calculate_user_similarity': time_calls(recommender.calculate_user_similarity, pairs),
+        'calculate_group_compatibility': time_calls(recommender.calculate_group_compatibility,
+                                                    [(group,) for group in groups], items_per_call=10),
+        'find_best_partner': time_calls(recommender.find_best_partner,
+                                        [(group[0], group[1:]) for group in groups], items_per_call=4),
+        'find_compatible_partners': time_calls(recommender.find_compatible_partners, singles),
+        'recommend_for_individual': time_calls(recommender.recommend_for_individual, singles, setup=clear_cache),
+    }
+    for args in singles:
+        recommender.recommend_for_individual(*args)
+    results['recommend_for_individual_cached'] = time_calls(recommender.recommend_for_individual, singles)
+    for method in JointMovieRecommender.COUPLE_METHODS:
+        results[f'recommend_for_couple[{method}]'] = time_calls(
+            recommender.recommend_for_couple, [pair + (method,) for pair in pairs], setup=clear_cache)
+        results[f'recommend_for_couples[{method}]'] = time_calls(
+            recommender.recommend_for_couples, [(pairs, method)], items_per_call=len(pairs))
+    results['recommend_for_couple[hybrid,diversity=0.3]'] = time_calls(
+        recommender.recommend_for_couple, [pair + ('hybrid', 15, 0.3) for pair in pairs], setup=clear_cache)
+    results['recommend_for_groups[hybrid]'] = time_calls(
+        recommender.recommend_for_groups, [(groups, 'hybrid')], items_per_call=len(groups))
+    for strategy in JointMovieRecommender.GROUP_STRATEGIES:
+        results[f'recommend_for_group[{strategy}]'] = time_calls(
+            recommender.recommend_for_group, [(group, strategy) for group in groups])
+    results['analyze_group_preferences'] = time_calls(
+        recommender.analyze_group_preferences, [(group,) for group in groups])
+    results['recommend_watch_time'] = time_calls(recommender.recommend_watch_time, [(group,) for group in groups])
+    results['get_recommendation_explanation'] = time_calls(
+        recommender.get_recommendation_explanation,
+        [(int(movie), list(pair)) for movie, pair in zip(popular_movies, pairs)], setup=clear_cache)
+    results['explain_recommendations'] = time_calls(
+        recommender.explain_recommendations, [(popular_movies[:15].tolist(), group) for group in groups],
+        setup=clear_cache, items_per_call=15)
+
+    # Ingestion: add then remove the same small batches so the model ends where it started
+    batches = [ratings.sample(10, random_state=int(seed_)) for seed_ in rng.integers(0, 2 ** 31, n_calls)]
+    new_ratings = [(batch.assign(user_id=batch['user_id'] + 10 ** 9),) for batch in batches]
+    results['add_ratings'] = time_calls(recommender.add_ratings, new_ratings, items_per_call=10)
+    results['remove_ratings'] = time_calls(recommender.remove_ratings, new_ratings, items_per_call=10)
+
+    snapshot_dir = tempfile.mkdtemp(prefix='recommender-benchmark-')
+    try:
+        results['save'] = time_calls(recommender.save, [(snapshot_dir,)] * 3)
+        results['load'] = time_calls(JointMovieRecommender.load, [(snapshot_dir,)] * 3)
+    finally:
+        shutil.rmtree(snapshot_dir, ignore_errors=True)
+    return results
+
+
+def _default_job_counts() -> List[int]:
+    """1, 2, 4, ... and the core count itself"""
+    cpu_count = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 < cpu_count:
+        counts.append(counts[-1] * 2)
+    return counts + [cpu_count] if cpu_count > 1 else counts
+
+
+def benchmark_scaling(recommender: JointMovieRecommender, ratings: pd.DataFrame, job_counts: List[int],
+                      n_users: int = 5000, group_size: int = 5, seed: int = 0) -> Dict[str, Dict]:
+    """
+    Throughput of the process-parallel paths for each n_jobs value
+
+    Times the item similarity table build (worker start-up included) and one
+    recommend_for_groups call over n_users distinct users (after an untimed
+    call that warms the worker pool), speedups are relative to the first job count.
+    """
+    rng = np.random.default_rng(seed)
+    users = ratings['user_id'].unique()
+    users = rng.choice(users, size=min(n_users, len(users)) // group_size * group_size, replace=False)
+    groups = [[int(user) for user in group] for group in users.reshape(-1, group_size)]
+    original_n_jobs = recommender.n_jobs
+
+    results = {}
+    try:
+        for n_jobs in job_counts:
+            recommender.n_jobs = n_jobs
+            start = time.perf_counter()
+            recommender.setup_item_similarities()
+            similarity_seconds = time.perf_counter() - start
+
+            recommender.recommend_for_groups(groups, 'weighted')  # Starts and warms the worker pool
+            start = time.perf_counter()
+            recommender.recommend_for_groups(groups, 'weighted')
+            batch_seconds = time.perf_counter() - start
+            results[str(n_jobs)] = {
+                'item_similarity_seconds': round(similarity_seconds, 3),
+                'recommend_for_groups_seconds': round(batch_seconds, 3),
+                'users_per_s': round(len(users) / batch_seconds, 2)
+            }
+    finally:
+        recommender.close()
+        recommender.n_jobs = original_n_jobs
+
+    baseline = results[str(job_counts[0])]
+    for result in results.values():
+        result['item_similarity_speedup'] = round(baseline['item_similarity_seconds'] /
+                                                  result['item_similarity_seconds'], 2)
+        result['recommend_for_groups_speedup'] = round(baseline['recommend_for_groups_seconds'] /
+                                                       result['recommend_for_groups_seconds'], 2)
+    return results
+
+
+def benchmark_neighbour_index(recommender: JointMovieRecommender, n_queries: int = 100, seed: int = 0,
+                              probes: List[int] = (1, 2, 4, 8, 16)) -> Dict:
+    """
+    Recall@k against exact search and per-query latency of the IVF neighbour index
+
+    Uses the model's own index when it is in 'ivf' mode, otherwise builds one
+    over the same rating matrix, and sweeps n_probe to show the recall/speed
+    tradeoff.
+    """
+    index = recommender.neighbour_index
+    report = {}
+    if index.mode != 'ivf':
+        start = time.perf_counter()
+        index = UserNeighbourIndex(recommender.user_movie_matrix, mode='ivf')
+        report['ivf_build_seconds'] = round(time.perf_counter() - start, 3)
+    report['n_lists'] = index.n_lists
+
+    original_n_probe = index.n_probe
+    sweep = []
+    try:
+        for n_probe in probes:
+            index.n_probe = n_probe
+            result = index.evaluate_recall(recommender.n_neighbours, n_queries, random_state=seed)
+            sweep.append({'n_probe': n_probe, **{name: result[name] for name in
+                                                 ('k', 'queries', 'recall_at_k', 'index_query_ms', 'exact_query_ms')}})
+    finally:
+        index.n_probe = original_n_probe
+    report['n_probe'] = sweep
+    return report
+
+
+def run_benchmark(scale: str = '100k', engine: str = 'knn', neighbour_index: str = 'exact',
+                  n_calls: int = 20, seed: int = 42, n_jobs: int = None,
+                  scaling: List[int] = None) -> Dict:
+    """Generate data, build the recommender and benchmark it, returns the JSON-ready report"""
+    start = time.perf_counter()
+    ratings, movies = generate_dataset(scale, seed=seed)
+    generate_seconds = time.perf_counter() - start
+
+    build = build_recommender(ratings, movies, engine=engine, neighbour_index=neighbour_index, n_jobs=n_jobs)
+    recommender = build.pop('recommender')
+    # Before benchmark_methods, whose ingestion calls leave rating-less users behind
+    neighbour_index_recall = benchmark_neighbour_index(recommender, n_queries=5 * n_calls, seed=seed)
+    report = {
+        'scale': scale,
+        'seed': seed,
+        'engine': engine,
+        'neighbour_index': neighbour_index,
+        'n_jobs': n_jobs,
+        'dataset': {
+            'n_ratings': len(ratings),
+            'n_users': int(ratings['user_id'].nunique()),
+            'n_movies': len(movies),
+            'generate_seconds': round(generate_seconds, 3)
+        },
+        'build': build,
+        'methods': benchmark_methods(recommender, ratings, n_calls=n_calls, seed=seed),
+        'neighbour_index_recall': neighbour_index_recall,
+        'max_rss_mb': round(_max_rss_mb(), 1),
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'git_commit': _git_commit()
+        },
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z')
+    }
+    if scaling:
+        report['scaling'] = benchmark_scaling(recommender, ratings, scaling, seed=seed)
+        report['max_rss_mb'] = round(_max_rss_mb(), 1)
+    recommender.close()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark JointMovieRecommender on synthetic data")
+    parser.add_argument('--scale', choices=tuple(SCALES), default='100k')
+    parser.add_argument('--engine', choices=JointMovieRecommender.ENGINES, default='knn')
+    parser.add_argument('--neighbour-index', choices=('exact', 'ivf'), default='exact')
+    parser.add_argument('--calls', type=int, default=20, help="Timed calls per method")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--n-jobs', type=int, help="Worker processes for the benchmarked model (-1: every core)")
+    parser.add_argument('--scaling', nargs='*', type=int,
+                        help="Also measure parallel throughput for these n_jobs values "
+                             "(no values: 1, 2, 4, ... up to the core count)")
+    parser.add_argument('--output', help="Write the JSON report here (default: stdout)")
+    args = parser.parse_args()
+
+    scaling = args.scaling
+    if scaling is not None and not scaling:
+        scaling = _default_job_counts()
+    report = run_benchmark(args.scale, args.engine, args.neighbour_index, args.calls, args.seed,
+                           n_jobs=args.n_jobs, scaling=scaling)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,407 @@
+"""
+HTTP service for the Joint Movie Recommender
+
+Serves the React frontend from a fitted JointMovieRecommender. Requests are
+handled on an asyncio event loop, scoring runs on a thread pool, and
+concurrent couple requests are coalesced into micro-batches for the
+vectorized recommend_for_couples scorer.
+
+Endpoints (GET, query-string parameters, JSON responses):
+    /profile?user_id=1
+    /similarity?user1=1&user2=2
+    /couple?user1=1&user2=2&method=hybrid&n=15[&diversity=0.3]
+    /group?users=1,2,3&strategy=average&n=15[&diversity=0.3]
+    /explanation?movie_id=101&users=1,2
+    /explanations?movie_ids=101,102,103&users=1,2
+    /watch-time?users=1,2&n=3
+    /metrics
+
+Run with a snapshot written by JointMovieRecommender.save():
+    python api_server.py --snapshot models/latest --port 8000
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from data_preprocessing import load_recommender
+from joint_recommender import JointMovieRecommender
+
+
+class RequestError(Exception):
+    """Client error, answered with the given HTTP status"""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+class LatencyTracker:
+    """Rolling per-endpoint latency samples with p50/p99 summaries"""
+
+    def __init__(self, window: int = 10000):
+        """
+        Args:
+            window (int): Most recent requests kept per endpoint
+        """
+        self.window = window
+        self._samples: Dict[str, deque] = {}
+        self._counts: Dict[str, int] = {}
+
+    def record(self, endpoint: str, seconds: float):
+        """Add one request latency"""
+        self._samples.setdefault(endpoint, deque(maxlen=self.window)).append(seconds)
+        self._counts[endpoint] = self._counts.get(endpoint, 0) + 1
+
+    def summary(self) -> Dict[str, Dict]:
+        """Request count and p50/p99/max latency in milliseconds per endpoint"""
+        report = {}
+        for endpoint, samples in self._samples.items():
+            latencies = np.array(samples) * 1000
+            report[endpoint] = {
+                'requests': self._counts[endpoint],
+                'p50_ms': round(float(np.percentile(latencies, 50)), 3),
+                'p99_ms': round(float(np.percentile(latencies, 99)), 3),
+                'max_ms': round(float(latencies.max()), 3)
+            }
+        return report
+
+
+class CoupleBatcher:
+    """
+    Coalesce concurrent couple requests into recommend_for_couples calls
+
+    The first request for a (method, n) opens a batch that is flushed after
+    batch_window seconds or once max_batch requests have joined it, so under
+    load many couples share one vectorized scoring pass.
+    """
+
+    def __init__(self, recommender: JointMovieRecommender, executor: ThreadPoolExecutor,
+                 batch_window: float = 0.005, max_batch: int = 64):
+        """
+        Args:
+            recommender (JointMovieRecommender): Fitted recommender
+            executor (ThreadPoolExecutor): Pool running the scoring
+            batch_window (float): Seconds a batch waits for more requests
+            max_batch (int): Requests that trigger an immediate flush
+        """
+        self.recommender = recommender
+        self.executor = executor
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self._pending: Dict[Tuple[str, int], List[Tuple[Tuple[int, int], asyncio.Future]]] = {}
+        self._timers: Dict[Tuple[str, int], asyncio.TimerHandle] = {}
+        self.batches = 0
+        self.batched_requests = 0
+
+    async def submit(self, user1_id: int, user2_id: int, method: str, n_recommendations: int) -> List[Dict]:
+        """Queue one couple and wait for its recommendations"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        key = (method, n_recommendations)
+        batch = self._pending.setdefault(key, [])
+        batch.append(((user1_id, user2_id), future))
+        if len(batch) >= self.max_batch:
+            self._flush(key)
+        elif len(batch) == 1:
+            self._timers[key] = loop.call_later(self.batch_window, self._flush, key)
+        return await future
+
+    def _flush(self, key: Tuple[str, int]):
+        # A batch filled up before its window: its timer must not flush the next batch early
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(key, None)
+        if batch:
+            asyncio.get_running_loop().create_task(self._run(key, batch))
+
+    async def _run(self, key: Tuple[str, int], batch: List[Tuple[Tuple[int, int], asyncio.Future]]):
+        method, n_recommendations = key
+        pairs = list(dict.fromkeys(pair for pair, _ in batch))
+        self.batches += 1
+        self.batched_requests += len(batch)
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self.executor, self.recommender.recommend_for_couples, pairs, method, n_recommendations)
+        except Exception as error:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        by_pair = {pair: frame.to_dict('records') for pair, frame in results.groupby(['user1_id', 'user2_id'])}
+        for pair, future in batch:
+            if not future.done():
+                future.set_result(by_pair.get(pair, []))
+
+
+def to_frontend_movie(record: Dict, score: float, member_scores: List[float],
+                      description: str = '') -> Dict:
+    """
+    Convert a recommendation into the frontend Movie shape (src/types/groupRecommender.ts)
+
+    rating is the joint score, matchPercentage that score on the 0-5 scale and
+    commonInterest how evenly the members' own scores agree (lowest / highest).
+    """
+    genres = record.get('genres')
+    highest = max(member_scores) if member_scores else 0
+    return {
+        'id': int(record['movie_id']),
+        'title': record.get('title') or '',
+        'description': description,
+        'genres': genres.split('|') if isinstance(genres, str) and genres else [],
+        'year': int(record['year']) if pd.notna(record.get('year')) else 0,
+        'rating': round(float(score), 2),
+        'matchPercentage': int(round(min(max(score, 0) / 5, 1) * 100)),
+        'availableOn': [],
+        'commonInterest': int(round(min(member_scores) / highest * 100)) if highest > 0 else 0
+    }
+
+
+def _json_ready(value):
+    """Make numpy values, NaN and pd.NA JSON friendly (missing values become null)"""
+    if isinstance(value, dict):
+        return {str(key): _json_ready(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_ready(item) for item in value]
+    if isinstance(value, np.ndarray):
+        return _json_ready(value.tolist())
+    if value is pd.NA:
+        return None
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+class RecommenderService:
+    """Routes HTTP requests to a JointMovieRecommender"""
+
+    def __init__(self, recommender: JointMovieRecommender, max_workers: int = 4,
+                 batch_window: float = 0.005, max_batch: int = 64):
+        """
+        Args:
+            recommender (JointMovieRecommender): Fitted recommender
+            max_workers (int): Threads running CPU-bound scoring
+            batch_window (float): Seconds a couple batch waits for more requests
+            max_batch (int): Couple requests that trigger an immediate flush
+        """
+        self.recommender = recommender
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.couple_batcher = CoupleBatcher(recommender, self.executor, batch_window, max_batch)
+        self.latency = LatencyTracker()
+        self.routes: Dict[str, Callable] = {
+            '/profile': self.profile,
+            '/similarity': self.similarity,
+            '/couple': self.couple,
+            '/group': self.group,
+            '/explanation': self.explanation,
+            '/explanations': self.explanations,
+            '/watch-time': self.watch_time,
+            '/metrics': self.metrics
+        }
+
+    async def _run(self, function: Callable, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    async def profile(self, params: Dict) -> Dict:
+        return await self._run(self.recommender.get_user_profile, _int_param(params, 'user_id'))
+
+    async def similarity(self, params: Dict) -> Dict:
+        return await self._run(self.recommender.calculate_user_similarity,
+                               _int_param(params, 'user1'), _int_param(params, 'user2'))
+
+    async def couple(self, params: Dict) -> Dict:
+        user1_id, user2_id = _int_param(params, 'user1'), _int_param(params, 'user2')
+        method = params.get('method', 'hybrid')
+        if method not in JointMovieRecommender.COUPLE_METHODS:
+            raise RequestError(f"Unknown method '{method}', expected one of {JointMovieRecommender.COUPLE_METHODS}")
+        diversity = _float_param(params, 'diversity', 0.0)
+        if diversity:
+            # Re-ranked lists come from the single-couple path, the batcher only ranks by score
+            try:
+                records = await self._run(self.recommender.recommend_for_couple, user1_id, user2_id, method,
+                                          _int_param(params, 'n', 15), diversity)
+            except ValueError as error:
+                raise RequestError(str(error))
+        else:
+            records = await self.couple_batcher.submit(user1_id, user2_id, method, _int_param(params, 'n', 15))
+        score_column = 'hybrid_score' if method == 'hybrid' else 'joint_score'
+        movies = [
+            to_frontend_movie(record, record[score_column], [record['user1_score'], record['user2_score']],
+                              f"Predicted ratings: {record['user1_score']:.1f} & {record['user2_score']:.1f}")
+            for record in records
+        ]
+        return {'user1_id': user1_id, 'user2_id': user2_id, 'method': method, 'movies': movies}
+
+    async def group(self, params: Dict) -> Dict:
+        user_ids = _int_list_param(params, 'users')
+        strategy = params.get('strategy', 'average')
+        try:
+            recommendations = await self._run(self.recommender.recommend_for_group, user_ids, strategy,
+                                              _int_param(params, 'n', 15), None, _float_param(params, 'diversity', 0.0))
+        except ValueError as error:
+            raise RequestError(str(error))
+        movies = [
+            to_frontend_movie(rec, rec['group_score'] if strategy != 'borda' else
+                              np.mean(list(rec['member_scores'].values())),
+                              list(rec['member_scores'].values()), rec['explanation'])
+            for rec in recommendations
+        ]
+        return {'user_ids': user_ids, 'strategy': strategy, 'movies': movies}
+
+    async def explanation(self, params: Dict) -> Dict:
+        return await self._run(self.recommender.get_recommendation_explanation,
+                               _int_param(params, 'movie_id'), _int_list_param(params, 'users'))
+
+    async def explanations(self, params: Dict) -> Dict:
+        explanations = await self._run(self.recommender.explain_recommendations,
+                                       _int_list_param(params, 'movie_ids'), _int_list_param(params, 'users'))
+        return {'explanations': explanations}
+
+    async def watch_time(self, params: Dict) -> Dict:
+        return await self._run(self.recommender.recommend_watch_time, _int_list_param(params, 'users'),
+                               _int_param(params, 'n', 3))
+
+    async def metrics(self, params: Dict) -> Dict:
+        return {
+            'latency': self.latency.summary(),
+            'couple_batches': self.couple_batcher.batches,
+            'couple_requests_batched': self.couple_batcher.batched_requests,
+            'cache': self.recommender.recommendation_cache.stats(),
+            'instrumentation': self.recommender.instrumentation.snapshot()
+        }
+
+    async def handle(self, method: str, target: str) -> Tuple[int, Dict]:
+        """Dispatch one request, returns (status, JSON body)"""
+        url = urlsplit(target)
+        handler = self.routes.get(url.path)
+        if method == 'OPTIONS':
+            return 204, {}
+        if method != 'GET':
+            return 405, {'error': f"Method {method} not allowed"}
+        if handler is None:
+            return 404, {'error': f"Unknown endpoint {url.path}"}
+
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        start = time.perf_counter()
+        try:
+            return 200, await handler(params)
+        except RequestError as error:
+            return error.status, {'error': str(error)}
+        except Exception as error:
+            return 500, {'error': f"{type(error).__name__}: {error}"}
+        finally:
+            self.latency.record(url.path, time.perf_counter() - start)
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Minimal HTTP/1.1: one request per connection, body ignored"""
+        try:
+            request_line = (await reader.readline()).decode('latin-1').split()
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode('latin-1').strip()
+                if not line:
+                    break
+                name, _, value = line.partition(':')
+                headers[name.strip().lower()] = value.strip()
+            if int(headers.get('content-length', 0)):
+                await reader.readexactly(int(headers['content-length']))
+
+            if len(request_line) < 2:
+                status, body = 400, {'error': 'Malformed request line'}
+            else:
+                status, body = await self.handle(request_line[0].upper(), request_line[1])
+
+            payload = json.dumps(_json_ready(body)).encode() if status != 204 else b''
+            writer.write(
+                f"HTTP/1.1 {status} {_REASONS.get(status, 'OK')}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(payload)}\r\n"
+                f"Access-Control-Allow-Origin: *\r\n"
+                f"Access-Control-Allow-Methods: GET, OPTIONS\r\n"
+                f"Connection: close\r\n\r\n".encode() + payload
+            )
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = '127.0.0.1', port: int = 8000):
+        """Serve until cancelled"""
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        print(f"🌐 Serving recommendations on http://{host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+
+_REASONS = {200: 'OK', 204: 'No Content', 400: 'Bad Request', 404: 'Not Found',
+            405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+
+def _int_param(params: Dict, name: str, default: Optional[int] = None) -> int:
+    if name not in params:
+        if default is None:
+            raise RequestError(f"Missing parameter '{name}'")
+        return default
+    try:
+        return int(params[name])
+    except ValueError:
+        raise RequestError(f"Parameter '{name}' must be an integer")
+
+
+def _float_param(params: Dict, name: str, default: float) -> float:
+    try:
+        return float(params.get(name, default))
+    except ValueError:
+        raise RequestError(f"Parameter '{name}' must be a number")
+
+
+def _int_list_param(params: Dict, name: str) -> List[int]:
+    if not params.get(name):
+        raise RequestError(f"Missing parameter '{name}'")
+    try:
+        return [int(value) for value in params[name].split(',') if value]
+    except ValueError:
+        raise RequestError(f"Parameter '{name}' must be comma-separated integers")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve Joint Movie Recommender over HTTP")
+    parser.add_argument('--snapshot', help="Snapshot directory written by JointMovieRecommender.save()")
+    parser.add_argument('--ratings', help="Ratings CSV/Parquet (user_id, movie_id, rating[, timestamp])")
+    parser.add_argument('--movies', help="Movies CSV/Parquet (movie_id, title, genres[, year])")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--batch-window-ms', type=float, default=5.0)
+    args = parser.parse_args()
+
+    if args.snapshot:
+        recommender = JointMovieRecommender.load(args.snapshot)
+    elif args.ratings and args.movies:
+        recommender = load_recommender(args.ratings, args.movies)
+    else:
+        parser.error("Pass --snapshot or both --ratings and --movies")
+
+    service = RecommenderService(recommender, max_workers=args.workers, batch_window=args.batch_window_ms / 1000)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Data loading for the Joint Movie Recommender
+============================================
+
+Reads MovieLens-style ratings and movies files. Ratings are streamed in
+chunks and kept as compact column arrays (int32 ids, half-star ratings,
+int32 timestamps) instead of a full DataFrame, so the 25M-rating release
+loads in a few hundred MB and goes straight into the sparse rating store:
+
+    recommender = load_recommender('ml-25m/ratings.csv', 'ml-25m/movies.csv')
+
+Parquet files need the optional pyarrow package.
+"""
+
+import argparse
+import logging
+import os
+from typing import Dict, Iterator, List
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # Optional, only needed for Parquet ratings
+    pq = None
+
+from joint_recommender import JointMovieRecommender
+
+logger = logging.getLogger(__name__)
+
+# MovieLens files use camelCase ids, the recommender uses snake_case
+COLUMN_ALIASES = {'userId': 'user_id', 'movieId': 'movie_id'}
+RATING_COLUMNS = ('user_id', 'movie_id', 'rating')
+DEFAULT_CHUNKSIZE = 1_000_000
+
+
+def _is_parquet(path: str) -> bool:
+    return os.path.splitext(path)[1].lower() in ('.parquet', '.pq')
+
+
+def _downcast(values: np.ndarray, dtype: type, column: str) -> np.ndarray:
+    """values as dtype, refusing to silently wrap ids that do not fit"""
+    info = np.iinfo(dtype)
+    if len(values) and (values.min() < info.min or values.max() > info.max):
+        raise ValueError(f"Column '{column}' has values outside the {np.dtype(dtype).name} range")
+    return values.astype(dtype, copy=False)
+
+
+def _iter_rating_chunks(path: str, chunksize: int, columns: List[str]) -> Iterator[pd.DataFrame]:
+    """DataFrames of at most chunksize rows, columns renamed to the recommender's names"""
+    aliases = {alias: name for alias, name in COLUMN_ALIASES.items() if name in columns}
+    wanted = set(columns) | set(aliases)
+    if _is_parquet(path):
+        if pq is None:
+            raise ImportError("Reading Parquet ratings requires pyarrow (pip install pyarrow)")
+        parquet_file = pq.ParquetFile(path)
+        names = [name for name in parquet_file.schema_arrow.names if name in wanted]
+        for batch in parquet_file.iter_batches(batch_size=chunksize, columns=names):
+            yield batch.to_pandas().rename(columns=aliases)
+    else:
+        reader = pd.read_csv(path, chunksize=chunksize, usecols=lambda name: name in wanted,
+                             dtype={'rating': np.float32})
+        for chunk in reader:
+            yield chunk.rename(columns=aliases)
+
+
+def read_rating_columns(path: str, chunksize: int = DEFAULT_CHUNKSIZE,
+                        include_timestamps: bool = True) -> Dict[str, np.ndarray]:
+    """
+    Stream a ratings CSV/Parquet file into compact column arrays
+
+    Each chunk is converted as soon as it is read: ids to int32, ratings to
+    uint8 half stars (float32 if a chunk has ratings off the half-star grid)
+    and timestamps to int32, so peak memory stays near the size of the
+    final arrays rather than that of a DataFrame of the whole file.
+
+    Args:
+        path (str): Ratings file with user_id/userId, movie_id/movieId, rating[, timestamp]
+        chunksize (int): Rows read per chunk
+        include_timestamps (bool): Also read the timestamp column when present
+
+    Returns:
+        Dict[str, np.ndarray]: 'user_id', 'movie_id' (int32), 'rating' (float32) and
+            'timestamp' (int32/int64) arrays, accepted by JointMovieRecommender as ratings_df
+    """
+    columns = list(RATING_COLUMNS) + (['timestamp'] if include_timestamps else [])
+    parts = {column: [] for column in columns}
+    n_rows = 0
+    for chunk in _iter_rating_chunks(path, chunksize, columns):
+        missing = [column for column in RATING_COLUMNS if column not in chunk.columns]
+        if missing:
+            raise ValueError(f"Ratings file {path} is missing columns {missing}")
+        parts['user_id'].append(_downcast(chunk['user_id'].to_numpy(), np.int32, 'user_id'))
+        parts['movie_id'].append(_downcast(chunk['movie_id'].to_numpy(), np.int32, 'movie_id'))
+
+        half_stars = chunk['rating'].to_numpy(dtype=np.float32) * 2
+        if np.all((half_stars == np.round(half_stars)) & (half_stars >= 0) & (half_stars <= 255)):
+            half_stars = half_stars.astype(np.uint8)
+        parts['rating'].append(half_stars)
+
+        if include_timestamps and 'timestamp' in chunk.columns:
+            timestamps = chunk['timestamp'].to_numpy(dtype=np.int64)
+            if not len(timestamps) or (timestamps.min() >= 0 and timestamps.max() <= np.iinfo(np.int32).max):
+                timestamps = timestamps.astype(np.int32)  # Seconds since 1970 fit until 2038
+            parts['timestamp'].append(timestamps)
+        n_rows += len(chunk)
+        logger.debug("Read %d ratings from %s", n_rows, path)
+
+    # Concatenate column by column, freeing each column's chunks before the next
+    columns_out = {}
+    for column in ('user_id', 'movie_id'):
+        columns_out[column] = np.concatenate(parts.pop(column)) if n_rows else np.empty(0, dtype=np.int32)
+
+    # Half stars back to stars, filled part by part to avoid a float32 copy of every chunk
+    ratings = np.empty(n_rows, dtype=np.float32)
+    start = 0
+    for part in parts.pop('rating'):
+        ratings[start:start + len(part)] = part
+        start += len(part)
+    ratings /= 2
+    columns_out['rating'] = ratings
+
+    timestamp_parts = parts.pop('timestamp', None)
+    if timestamp_parts and sum(len(part) for part in timestamp_parts) == n_rows:
+        columns_out['timestamp'] = np.concatenate(timestamp_parts)
+    logger.info("Loaded %d ratings from %s", n_rows, path)
+    return columns_out
+
+
+def load_movies(path: str) -> pd.DataFrame:
+    """
+    Read a movies CSV/Parquet file (movie_id/movieId, title, genres[, year])
+
+    MovieLens files carry the release year in the title, "Heat (1995)"; it is
+    parsed into the year column when the file has none.
+    """
+    if _is_parquet(path):
+        movies_df = pd.read_parquet(path)
+    else:
+        movies_df = pd.read_csv(path)
+    movies_df = movies_df.rename(columns=COLUMN_ALIASES)
+    if 'year' not in movies_df.columns:
+        years = movies_df['title'].astype(str).str.extract(r'\((\d{4})\)\s*$')[0]
+        movies_df['year'] = pd.to_numeric(years, errors='coerce').astype('Int64')
+    return movies_df
+
+
+def load_recommender(ratings_path: str, movies_path: str, chunksize: int = DEFAULT_CHUNKSIZE,
+                     include_timestamps: bool = True, **options) -> JointMovieRecommender:
+    """
+    Build a JointMovieRecommender straight from ratings/movies files
+
+    Args:
+        ratings_path (str): Ratings CSV/Parquet file, streamed with read_rating_columns
+        movies_path (str): Movies CSV/Parquet file
+        chunksize (int): Rating rows read per chunk
+        include_timestamps (bool): Keep rating timestamps (needed for watch-time features)
+        **options: Passed on to JointMovieRecommender (engine, n_neighbours, ...)
+    """
+    ratings = read_rating_columns(ratings_path, chunksize=chunksize, include_timestamps=include_timestamps)
+    movies_df = load_movies(movies_path)
+    recommender = JointMovieRecommender(ratings, movies_df, **options)
+    return recommender
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load ratings/movies files and save a recommender snapshot")
+    parser.add_argument('ratings', help="Ratings CSV/Parquet (user_id, movie_id, rating[, timestamp])")
+    parser.add_argument('movies', help="Movies CSV/Parquet (movie_id, title, genres[, year])")
+    parser.add_argument('--output', required=True, help="Snapshot directory for JointMovieRecommender.load()")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument('--engine', choices=JointMovieRecommender.ENGINES, default='knn')
+    parser.add_argument('--no-timestamps', action='store_true', help="Skip the timestamp column")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    recommender = load_recommender(args.ratings, args.movies, chunksize=args.chunksize,
+                                   include_timestamps=not args.no_timestamps, engine=args.engine)
+    recommender.save(args.output)
+    print(f"Saved {recommender.user_movie_matrix.nnz} ratings from "
+          f"{recommender.user_movie_matrix.shape[0]} users to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""
+Offline evaluation for the Joint Movie Recommender
+==================================================
+
+Holds out each user's most recent ratings, fits the recommender on the rest
+and scores the couple methods against the held-out movies:
+
+    train_df, test_df = time_based_split(ratings_df)
+    recommender = JointMovieRecommender(train_df, movies_df)
+    couples = sample_couples(test_df, recommender, n_couples=2000)
+    report = evaluate_couples(recommender, test_df, couples, k=10)
+
+A recommended movie is a hit for a couple when either member rated it at
+least relevant_threshold in the test period. Ranking metrics are computed for
+all couples at once with frame merges and bincounts, the recommendations
+themselves come from the batched recommend_for_couples (process-parallel
+with n_jobs).
+"""
+
+import argparse
+import logging
+import time
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from joint_recommender import JointMovieRecommender
+
+logger = logging.getLogger(__name__)
+
+RELEVANT_RATING = 4.0  # Held-out ratings at or above this count as movies the user enjoyed
+
+
+def time_based_split(ratings_df: pd.DataFrame, test_fraction: float = 0.2,
+                     min_train_ratings: int = 5) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Split every user's ratings by time, the latest test_fraction going to test
+
+    Args:
+        ratings_df (pd.DataFrame): Ratings (user_id, movie_id, rating, timestamp)
+        test_fraction (float): Share of each user's ratings held out
+        min_train_ratings (int): Users are only tested if this many ratings stay in train
+
+    Returns:
+        Tuple[pd.DataFrame, pd.DataFrame]: Train and test ratings
+    """
+    if not 0 < test_fraction < 1:
+        raise ValueError(f"test_fraction must be between 0 and 1, got {test_fraction}")
+    if 'timestamp' not in ratings_df.columns:
+        raise ValueError("A time-based split needs a timestamp column")
+
+    order = np.lexsort((ratings_df['timestamp'].to_numpy(), ratings_df['user_id'].to_numpy()))
+    user_ids = ratings_df['user_id'].to_numpy()[order]
+    first = np.searchsorted(user_ids, user_ids, side='left')
+    counts = np.searchsorted(user_ids, user_ids, side='right') - first
+    position = np.arange(len(order)) - first
+    n_train = np.maximum(np.ceil(counts * (1 - test_fraction)).astype(np.int64), min_train_ratings)
+
+    is_test = np.zeros(len(order), dtype=bool)
+    is_test[order] = position >= n_train
+    return ratings_df[~is_test], ratings_df[is_test]
+
+
+def relevant_items(test_df: pd.DataFrame, relevant_threshold: float = RELEVANT_RATING) -> pd.DataFrame:
+    """(user_id, movie_id) pairs of held-out movies each user enjoyed"""
+    liked = test_df[test_df['rating'] >= relevant_threshold]
+    return liked[['user_id', 'movie_id']].drop_duplicates().reset_index(drop=True)
+
+
+def sample_couples(test_df: pd.DataFrame, recommender: JointMovieRecommender, n_couples: int = 1000,
+                   relevant_threshold: float = RELEVANT_RATING, seed: int = 0) -> np.ndarray:
+    """
+    Random couples of distinct users who are known to the recommender and
+    enjoyed at least one held-out movie
+
+    Returns:
+        np.ndarray: Up to n_couples x 2 user IDs (repeated couples are dropped)
+    """
+    users = relevant_items(test_df, relevant_threshold)['user_id'].unique()
+    users = np.sort(users[recommender.user_index.lookup(users) >= 0])
+    if len(users) < 2:
+        raise ValueError("Need at least 2 test users with relevant held-out movies")
+    rng = np.random.default_rng(seed)
+    first = rng.integers(0, len(users), n_couples)
+    second = (first + rng.integers(1, len(users), n_couples)) % len(users)  # Never the same user twice
+    couples = np.column_stack([users[first], users[second]])
+    return pd.DataFrame(np.sort(couples, axis=1)).drop_duplicates().to_numpy()
+
+
+def ranking_metrics(recommendations: pd.DataFrame, relevant: pd.DataFrame, n_queries: int,
+                    k: int = 10) -> pd.DataFrame:
+    """
+    precision@k, recall@k and NDCG@k of many ranked lists at once
+
+    Args:
+        recommendations (pd.DataFrame): Ranked lists (query, movie_id, rank), rank starting at 1
+        relevant (pd.DataFrame): Relevant movies (query, movie_id)
+        n_queries (int): Queries are 0..n_queries - 1, those without recommendations score 0
+        k (int): Cut-off
+
+    Returns:
+        pd.DataFrame: One row per query (hits, n_relevant, precision, recall, ndcg)
+    """
+    top = recommendations[recommendations['rank'] <= k]
+    hits = top.merge(relevant, on=['query', 'movie_id'])
+    query = hits['query'].to_numpy(dtype=np.int64)
+    discount = 1 / np.log2(hits['rank'].to_numpy(dtype=np.float64) + 1)
+
+    n_hits = np.bincount(query, minlength=n_queries)
+    n_relevant = np.bincount(relevant['query'].to_numpy(dtype=np.int64), minlength=n_queries)
+    dcg = np.bincount(query, weights=discount, minlength=n_queries)
+    # Ideal DCG: every one of the first min(n_relevant, k) ranks is a hit
+    ideal = np.concatenate([[0], np.cumsum(1 / np.log2(np.arange(2, k + 2)))])[np.minimum(n_relevant, k)]
+    return pd.DataFrame({
+        'hits': n_hits,
+        'n_relevant': n_relevant,
+        'precision': n_hits / k,
+        'recall': np.divide(n_hits, n_relevant, out=np.zeros(n_queries), where=n_relevant > 0),
+        'ndcg': np.divide(dcg, ideal, out=np.zeros(n_queries), where=ideal > 0)
+    })
+
+
+def member_hit_rates(recommendations: pd.DataFrame, members: pd.DataFrame, relevant: pd.DataFrame,
+                     n_queries: int, group_size: int, k: int = 10) -> np.ndarray:
+    """
+    Share of each group's top-k list that each member enjoyed
+
+    Args:
+        recommendations (pd.DataFrame): Ranked lists (query, movie_id, rank)
+        members (pd.DataFrame): Group members (query, member, user_id), member 0..group_size - 1
+        relevant (pd.DataFrame): Per-user relevant movies (user_id, movie_id)
+        n_queries (int): Number of groups
+        group_size (int): Members per group
+        k (int): Cut-off
+
+    Returns:
+        np.ndarray: n_queries x group_size hit rates
+    """
+    top = recommendations[recommendations['rank'] <= k]
+    hits = top.merge(members, on='query').merge(relevant, on=['user_id', 'movie_id'])
+    slots = hits['query'].to_numpy(dtype=np.int64) * group_size + hits['member'].to_numpy(dtype=np.int64)
+    return np.bincount(slots, minlength=n_queries * group_size).reshape(n_queries, group_size) / k
+
+
+def evaluate_couples(recommender: JointMovieRecommender, test_df: pd.DataFrame, couples: np.ndarray,
+                     methods: Sequence[str] = JointMovieRecommender.COUPLE_METHODS, k: int = 10,
+                     relevant_threshold: float = RELEVANT_RATING) -> pd.DataFrame:
+    """
+    Quality and cost of each couple method on held-out ratings
+
+    Args:
+        recommender (JointMovieRecommender): Model fitted on the train split
+        test_df (pd.DataFrame): Held-out ratings
+        couples (np.ndarray): n x 2 user IDs, e.g. from sample_couples (repeats are dropped)
+        methods (Sequence[str]): Couple methods to compare
+        k (int): List length evaluated
+        relevant_threshold (float): Held-out ratings at or above this are hits
+
+    Returns:
+        pd.DataFrame: One row per method: mean precision/recall/NDCG@k over couples,
+            catalog coverage, min/mean member hit rate, share of empty lists, seconds
+            and couples per second
+    """
+    couples = pd.DataFrame(np.asarray(couples, dtype=np.int64).reshape(-1, 2)).drop_duplicates().to_numpy()
+    n_couples = len(couples)
+    members = pd.DataFrame({
+        'query': np.repeat(np.arange(n_couples), 2),
+        'member': np.tile([0, 1], n_couples),
+        'user_id': couples.ravel()
+    })
+    user_relevant = relevant_items(test_df, relevant_threshold)
+    # A couple's relevant movies: those either member enjoyed
+    couple_relevant = members.merge(user_relevant, on='user_id')[['query', 'movie_id']].drop_duplicates()
+    n_movies = len(recommender.movie_index)
+
+    rows = []
+    for method in methods:
+        start = time.perf_counter()
+        recommendations = recommender.recommend_for_couples([tuple(pair) for pair in couples], method, k)
+        seconds = time.perf_counter() - start
+        # Number rows by couple so metrics can bincount over couples
+        recommendations = recommendations.assign(query=_couple_positions(recommendations, couples))
+
+        metrics = ranking_metrics(recommendations, couple_relevant, n_couples, k)
+        hit_rates = member_hit_rates(recommendations, members, user_relevant, n_couples, 2, k)
+        rows.append({
+            'method': method,
+            f'precision@{k}': metrics['precision'].mean(),
+            f'recall@{k}': metrics['recall'].mean(),
+            f'ndcg@{k}': metrics['ndcg'].mean(),
+            'coverage': recommendations['movie_id'].nunique() / n_movies if n_movies else 0.0,
+            'min_member_hit_rate': hit_rates.min(axis=1).mean(),
+            'mean_member_hit_rate': hit_rates.mean(axis=1).mean(),
+            'empty_lists': 1 - recommendations['query'].nunique() / n_couples,
+            'seconds': seconds,
+            'couples_per_s': n_couples / seconds if seconds > 0 else float('inf')
+        })
+    return pd.DataFrame(rows)
+
+
+def _couple_positions(recommendations: pd.DataFrame, couples: np.ndarray) -> np.ndarray:
+    """Position in couples (distinct pairs) of every recommendation row"""
+    positions = pd.Series(np.arange(len(couples)), index=pd.MultiIndex.from_arrays([couples[:, 0], couples[:, 1]]))
+    rows = pd.MultiIndex.from_arrays([recommendations['user1_id'].to_numpy(), recommendations['user2_id'].to_numpy()])
+    return positions.reindex(rows).to_numpy()
+
+
+def compare_engines(ratings_df: pd.DataFrame, movies_df: pd.DataFrame,
+                    engines: Sequence[str] = JointMovieRecommender.ENGINES,
+                    methods: Sequence[str] = JointMovieRecommender.COUPLE_METHODS, n_couples: int = 2000,
+                    k: int = 10, test_fraction: float = 0.2, seed: int = 0, **options) -> pd.DataFrame:
+    """
+    Fit every engine on one time-based split and evaluate every couple method
+
+    Args:
+        ratings_df (pd.DataFrame): All ratings (user_id, movie_id, rating, timestamp)
+        movies_df (pd.DataFrame): Movie metadata
+        engines (Sequence[str]): Scoring engines to fit
+        methods (Sequence[str]): Couple methods to compare
+        n_couples (int): Synthetic couples evaluated, the same ones for every engine
+        k (int): List length evaluated
+        test_fraction (float): Share of each user's latest ratings held out
+        seed (int): Couple sampling seed
+        **options: Passed on to JointMovieRecommender (n_jobs, n_neighbours, ...)
+
+    Returns:
+        pd.DataFrame: evaluate_couples rows with engine and build_seconds columns
+    """
+    train_df, test_df = time_based_split(ratings_df, test_fraction)
+    couples: Optional[np.ndarray] = None
+    reports: List[pd.DataFrame] = []
+    for engine in engines:
+        start = time.perf_counter()
+        recommender = JointMovieRecommender(train_df, movies_df, engine=engine, **options)
+        build_seconds = time.perf_counter() - start
+        if couples is None:
+            couples = sample_couples(test_df, recommender, n_couples, seed=seed)
+        try:
+            report = evaluate_couples(recommender, test_df, couples, methods, k)
+        finally:
+            recommender.close()
+        report.insert(0, 'engine', engine)
+        report['build_seconds'] = build_seconds
+        reports.append(report)
+        logger.info("Evaluated engine '%s'", engine)
+    return pd.concat(reports, ignore_index=True)
+
+
+def main():
+    from data_preprocessing import load_movies, read_rating_columns
+
+    parser = argparse.ArgumentParser(description="Compare engines and couple methods on held-out ratings")
+    parser.add_argument('ratings', help="Ratings CSV/Parquet with timestamps")
+    parser.add_argument('movies', help="Movies CSV/Parquet")
+    parser.add_argument('--engines', nargs='+', choices=JointMovieRecommender.ENGINES,
+                        default=list(JointMovieRecommender.ENGINES))
+    parser.add_argument('--couples', type=int, default=2000)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--test-fraction', type=float, default=0.2)
+    parser.add_argument('--n-jobs', type=int, help="Worker processes for batch scoring (-1: every core)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="Also write the report as CSV")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    ratings_df = pd.DataFrame(read_rating_columns(args.ratings))
+    report = compare_engines(ratings_df, load_movies(args.movies), engines=args.engines,
+                             n_couples=args.couples, k=args.k, test_fraction=args.test_fraction,
+                             seed=args.seed, n_jobs=args.n_jobs)
+    with pd.option_context('display.width', 200, 'display.max_columns', None):
+        print(report.round(4).to_string(index=False))
+    if args.output:
+        report.to_csv(args.output, index=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -12,12 +12,650 @@ Date: 2024
 
 import pandas as pd
 import numpy as np
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Tuple, Optional, Callable, Union
+from scipy import sparse
+from scipy.stats import rankdata
 from sklearn.metrics.pairwise import cosine_similarity
 from sklearn.decomposition import NMF
 from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import normalize
+import time
+import json
+import os
+import io
+import multiprocessing
+import shutil
+import tempfile
+import weakref
+import random
+import logging
+import cProfile
+import functools
+import pstats
+import threading
 import warnings
-warnings.filterwarnings('ignore')
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from sklearn.exceptions import ConvergenceWarning
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT_VERSION = 1
+
+def _save_snapshot_arrays(path: str, arrays: Dict) -> Dict:
+    """Save dense/sparse arrays as .npy segments, returns their manifest entries"""
+    entries = {}
+    for name, value in arrays.items():
+        if value is None:
+            continue
+        if sparse.issparse(value):
+            value = value.tocsr()
+            for part in ('data', 'indices', 'indptr'):
+                np.save(os.path.join(path, f'{name}.{part}.npy'), getattr(value, part))
+            entries[name] = {'sparse': True, 'shape': list(value.shape)}
+        else:
+            np.save(os.path.join(path, f'{name}.npy'), np.asarray(value))
+            entries[name] = {'sparse': False}
+    return entries
+
+def _load_snapshot_arrays(path: str, entries: Dict, mmap: bool) -> Dict:
+    """Load (or memory-map) the segments listed in a snapshot manifest"""
+    mmap_mode = 'r' if mmap else None
+    arrays = {}
+    for name, entry in entries.items():
+        if entry['sparse']:
+            data, indices, indptr = (np.load(os.path.join(path, f'{name}.{part}.npy'), mmap_mode=mmap_mode)
+                                     for part in ('data', 'indices', 'indptr'))
+            arrays[name] = sparse.csr_matrix((data, indices, indptr), shape=tuple(entry['shape']), copy=False)
+        else:
+            arrays[name] = np.load(os.path.join(path, f'{name}.npy'), mmap_mode=mmap_mode)
+    return arrays
+
+def _resolve_n_jobs(n_jobs: Optional[int]) -> int:
+    """Worker processes for an n_jobs option: None/1 serial, -1 every core, -2 all but one, ..."""
+    if not n_jobs:
+        return 1
+    if n_jobs < 0:
+        return max(1, (os.cpu_count() or 1) + 1 + n_jobs)
+    return n_jobs
+
+def _process_context():
+    """Start workers from a clean process rather than forking a parent that may run threads"""
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+def _top_similar_items(features: sparse.csr_matrix, features_t: sparse.csr_matrix, start: int, stop: int,
+                       k: int, block_size: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    k most similar items of feature rows start:stop, block_size rows at a time
+    
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: Kept items per row, their columns and
+            similarities (positive similarities only, rows concatenated)
+    """
+    counts, indices, similarities = [], [], []
+    for block_start in range(start, stop, block_size):
+        block = (features[block_start:min(block_start + block_size, stop)] @ features_t).toarray()
+        block[np.arange(len(block)), np.arange(block_start, block_start + len(block))] = 0
+        top = np.argpartition(-block, k - 1, axis=1)[:, :k] if k > 0 else np.empty((len(block), 0), dtype=np.int64)
+        top_sims = np.take_along_axis(block, top, axis=1)
+        positive = top_sims > 0
+        counts.append(positive.sum(axis=1))
+        indices.append(top[positive])
+        similarities.append(top_sims[positive])
+    return np.concatenate(counts), np.concatenate(indices), np.concatenate(similarities)
+
+class IdIndex:
+    """
+    Mapping between external ids (user_id / movie_id) and dense matrix positions
+    
+    Stored as flat integer arrays (ids in position order plus their argsort)
+    rather than a Python dict, so lookups are vectorized binary searches and
+    the map costs a few bytes per id even with millions of users.
+    """
+    
+    def __init__(self, ids: np.ndarray):
+        """
+        Args:
+            ids (np.ndarray): Unique ids, position i of the array is matrix row/column i
+        """
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self._order = np.argsort(self.ids, kind='stable')
+        self._sorted_ids = self.ids[self._order]
+    
+    @classmethod
+    def from_arrays(cls, ids: np.ndarray, order: np.ndarray, sorted_ids: np.ndarray) -> 'IdIndex':
+        """Rebuild an index from saved arrays without re-sorting"""
+        index = cls.__new__(cls)
+        index.ids, index._order, index._sorted_ids = ids, order, sorted_ids
+        return index
+    
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Arrays needed by from_arrays"""
+        return {'ids': self.ids, 'order': self._order, 'sorted_ids': self._sorted_ids}
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def __contains__(self, key) -> bool:
+        return self.get(key) is not None
+    
+    def lookup(self, keys) -> np.ndarray:
+        """Map an array of ids to positions, unknown ids map to -1"""
+        keys = np.asarray(keys, dtype=np.int64)
+        if len(self.ids) == 0:
+            return np.full(keys.shape, -1, dtype=np.int64)
+        pos = np.searchsorted(self._sorted_ids, keys)
+        pos = np.minimum(pos, len(self.ids) - 1)
+        found = self._sorted_ids[pos] == keys
+        return np.where(found, self._order[pos], -1)
+    
+    def get(self, key) -> Optional[int]:
+        """Position of a single id, or None if the id is unknown"""
+        try:
+            position = int(self.lookup([key])[0])
+        except (TypeError, ValueError, OverflowError):
+            return None
+        return position if position >= 0 else None
+    
+    def extend(self, keys) -> np.ndarray:
+        """
+        Add unseen ids at the end (existing positions never move)
+        
+        Args:
+            keys: Ids to look up, unknown ones are appended in first-seen order
+            
+        Returns:
+            np.ndarray: Position of every key
+        """
+        keys = np.asarray(keys, dtype=np.int64)
+        positions = self.lookup(keys)
+        new_ids = pd.unique(keys[positions < 0])
+        if len(new_ids):
+            new_positions = np.arange(len(self.ids), len(self.ids) + len(new_ids))
+            self.ids = np.concatenate([self.ids, new_ids])
+            
+            # Merge the new ids into the sorted view instead of re-sorting everything
+            new_order = np.argsort(new_ids, kind='stable')
+            insert_at = np.searchsorted(self._sorted_ids, new_ids[new_order])
+            self._sorted_ids = np.insert(self._sorted_ids, insert_at, new_ids[new_order])
+            self._order = np.insert(self._order, insert_at, new_positions[new_order])
+            positions = self.lookup(keys)
+        return positions
+
+class UserNeighbourIndex:
+    """
+    Top-k similar-user index built once from the rating matrix
+    
+    Rows are L2-normalized up front so cosine similarity is a plain sparse dot
+    product. 'exact' mode multiplies the query row with the transposed
+    normalized matrix and takes the top k of the resulting dense vector of
+    similarities to every user (block_size queries per product for batches),
+    so each lookup is linear in the number of users; 'ivf' mode clusters users
+    into inverted lists with spherical k-means and only scores users in the
+    n_probe lists closest to the query, which keeps lookups sub-linear.
+    evaluate_recall measures an index against exact search.
+    """
+    
+    MODES = ('exact', 'ivf')
+    
+    def __init__(self, rating_matrix: sparse.csr_matrix, mode: str = 'exact',
+                 n_lists: Optional[int] = None, n_probe: int = 8, block_size: int = 256,
+                 random_state: int = 42):
+        """
+        Args:
+            rating_matrix (sparse.csr_matrix): User-movie rating matrix
+            mode (str): 'exact' or 'ivf'
+            n_lists (Optional[int]): Number of IVF lists (defaults to ~sqrt(users))
+            n_probe (int): IVF lists scanned per query, trades speed for recall
+            block_size (int): Query rows scored per block in batch lookups
+            random_state (int): Seed for the IVF clustering
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown neighbour index mode '{mode}', expected one of {self.MODES}")
+        self.mode = mode
+        self.n_probe = n_probe
+        self.block_size = block_size
+        self.random_state = random_state
+        self.norms = np.sqrt(np.asarray(rating_matrix.multiply(rating_matrix).sum(axis=1)).ravel()).astype(np.float32)
+        self._set_normalized(rating_matrix)
+        self.n_lists = n_lists or max(1, int(np.sqrt(self.normalized.shape[0])))
+        self.centroids = None
+        self.labels = None
+        self._list_offsets = None
+        self._list_members = None
+        if mode == 'ivf':
+            self._build_ivf()
+    
+    SNAPSHOT_FIELDS = ('mode', 'n_probe', 'block_size', 'random_state', 'n_lists')
+    
+    @classmethod
+    def from_snapshot(cls, config: Dict, arrays: Dict) -> 'UserNeighbourIndex':
+        """Rebuild an index from to_snapshot() output without refitting"""
+        index = cls.__new__(cls)
+        for field in cls.SNAPSHOT_FIELDS:
+            setattr(index, field, config[field])
+        index.norms = arrays['norms']
+        index.normalized = arrays['normalized']
+        index.normalized_t = arrays['normalized_t']
+        index.centroids = arrays.get('centroids')
+        index.labels = arrays.get('labels')
+        index._list_members = arrays.get('list_members')
+        index._list_offsets = arrays.get('list_offsets')
+        return index
+    
+    def to_snapshot(self) -> Tuple[Dict, Dict]:
+        """Config values and arrays (dense or sparse) describing the fitted index"""
+        config = {field: getattr(self, field) for field in self.SNAPSHOT_FIELDS}
+        arrays = {'norms': self.norms, 'normalized': self.normalized, 'normalized_t': self.normalized_t}
+        if self.mode == 'ivf':
+            arrays.update({'centroids': self.centroids, 'labels': self.labels,
+                           'list_members': self._list_members, 'list_offsets': self._list_offsets})
+        return config, arrays
+    
+    def _set_normalized(self, rating_matrix: sparse.csr_matrix):
+        """Scale rating rows by the stored per-user norms (one pass over the ratings)"""
+        scale = np.divide(1.0, self.norms, out=np.zeros_like(self.norms), where=self.norms > 0)
+        self.normalized = sparse.csr_matrix(
+            (rating_matrix.data * np.repeat(scale, np.diff(rating_matrix.indptr)),
+             rating_matrix.indices, rating_matrix.indptr),
+            shape=rating_matrix.shape, dtype=np.float32
+        )
+        self.normalized_t = self.normalized.T.tocsr()
+    
+    def update(self, rating_matrix: sparse.csr_matrix, changed_rows: np.ndarray):
+        """
+        Refresh the index after some users' ratings changed or users were added
+        
+        Only the changed users' norms (and IVF list assignments) are recomputed;
+        IVF centroids are kept as fitted. The normalized matrix and its transpose
+        are still rebuilt from the stored norms, a vectorized pass over all
+        ratings of the same order as rebuilding the CSR rating store itself.
+        
+        Args:
+            rating_matrix (sparse.csr_matrix): Updated user-movie rating matrix
+            changed_rows (np.ndarray): Rows whose ratings changed (new users included)
+        """
+        changed_rows = np.asarray(changed_rows, dtype=np.int64)
+        self.norms = np.concatenate([
+            self.norms, np.zeros(rating_matrix.shape[0] - len(self.norms), dtype=np.float32)
+        ])
+        changed = rating_matrix[changed_rows]
+        self.norms[changed_rows] = np.sqrt(np.asarray(changed.multiply(changed).sum(axis=1)).ravel())
+        self._set_normalized(rating_matrix)
+        
+        if self.mode == 'ivf':
+            # New movies get zero centroid weight
+            self.centroids = np.pad(self.centroids, ((0, 0), (0, rating_matrix.shape[1] - self.centroids.shape[1])))
+            self.labels = np.concatenate([
+                self.labels, np.zeros(rating_matrix.shape[0] - len(self.labels), dtype=self.labels.dtype)
+            ])
+            centroid_sims = np.asarray(self.normalized[changed_rows] @ self.centroids.T)
+            self.labels[changed_rows] = centroid_sims.argmax(axis=1)
+            self._build_lists()
+    
+    def _build_ivf(self):
+        """Cluster users with spherical k-means and store each cluster as an inverted list"""
+        from sklearn.cluster import MiniBatchKMeans
+        
+        n_users = self.normalized.shape[0]
+        self.n_lists = min(self.n_lists, n_users)
+        kmeans = MiniBatchKMeans(n_clusters=self.n_lists, random_state=self.random_state,
+                                 batch_size=4096, n_init=3)
+        self.labels = kmeans.fit_predict(self.normalized)
+        self.centroids = normalize(kmeans.cluster_centers_.astype(np.float32))
+        self._build_lists()
+    
+    def _build_lists(self):
+        """Users sorted by list id, so each inverted list is a contiguous slice"""
+        self._list_members = np.argsort(self.labels, kind='stable')
+        self._list_offsets = np.concatenate([[0], np.cumsum(np.bincount(self.labels, minlength=self.n_lists))])
+    
+    def _ivf_candidates(self, row: int) -> np.ndarray:
+        """Users in the n_probe inverted lists closest to the query user"""
+        centroid_sims = np.asarray(self.normalized[row] @ self.centroids.T)[0]
+        n_probe = min(self.n_probe, self.n_lists)
+        probe = np.argpartition(-centroid_sims, n_probe - 1)[:n_probe]
+        return np.concatenate([
+            self._list_members[self._list_offsets[l]:self._list_offsets[l + 1]] for l in probe
+        ])
+    
+    @staticmethod
+    def _top_k(candidates: np.ndarray, sims: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Top k positive similarities, sorted descending (ties by row)"""
+        positive = sims > 0
+        candidates, sims = candidates[positive], sims[positive]
+        if len(sims) > k:
+            keep = np.argpartition(-sims, k - 1)[:k]
+            candidates, sims = candidates[keep], sims[keep]
+        order = np.lexsort((candidates, -sims))
+        return candidates[order], sims[order]
+    
+    def query(self, row: int, k: int = 50, exact: Optional[bool] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the k most similar users to a user
+        
+        Args:
+            row (int): Matrix row of the query user
+            k (int): Number of neighbours
+            exact (Optional[bool]): Force exact search (defaults to the index mode)
+            
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Neighbour rows and cosine similarities (query user excluded)
+        """
+        if exact is None:
+            exact = self.mode == 'exact'
+        if exact:
+            sims = (self.normalized[row] @ self.normalized_t).toarray()[0]
+            candidates = np.arange(len(sims))
+        else:
+            candidates = self._ivf_candidates(row)
+            sims = (self.normalized[candidates] @ self.normalized[row].T).toarray()[:, 0]
+        candidates_mask = candidates != row
+        return self._top_k(candidates[candidates_mask], sims[candidates_mask], k)
+    
+    def query_batch(self, rows: np.ndarray, k: int = 50) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Find neighbours for many users, scoring exact queries block by block
+        
+        Args:
+            rows (np.ndarray): Matrix rows of the query users
+            k (int): Number of neighbours per user
+            
+        Returns:
+            List[Tuple[np.ndarray, np.ndarray]]: Neighbour rows and similarities per query row
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        if self.mode != 'exact':
+            return [self.query(row, k) for row in rows]
+        
+        results = []
+        all_rows = np.arange(self.normalized.shape[0])
+        for start in range(0, len(rows), self.block_size):
+            block = rows[start:start + self.block_size]
+            sims = (self.normalized[block] @ self.normalized_t).toarray()
+            for query_row, block_sims in zip(block, sims):
+                keep = all_rows != query_row
+                results.append(self._top_k(all_rows[keep], block_sims[keep], k))
+        return results
+    
+    def evaluate_recall(self, k: int = 50, sample_size: int = 200, random_state: int = 0) -> Dict:
+        """
+        Benchmark this index against exact search on a sample of users
+        
+        Args:
+            k (int): Number of neighbours
+            sample_size (int): Number of query users to sample
+            random_state (int): Seed for sampling query users
+            
+        Returns:
+            Dict: Mean recall@k and mean per-query latency of both searches
+        """
+        rng = np.random.default_rng(random_state)
+        n_users = self.normalized.shape[0]
+        sample = rng.choice(n_users, size=min(sample_size, n_users), replace=False)
+        
+        recalls, index_time, exact_time = [], 0.0, 0.0
+        for row in sample:
+            start = time.perf_counter()
+            found, _ = self.query(row, k)
+            index_time += time.perf_counter() - start
+            
+            start = time.perf_counter()
+            truth, _ = self.query(row, k, exact=True)
+            exact_time += time.perf_counter() - start
+            
+            if len(truth):
+                recalls.append(len(np.intersect1d(found, truth)) / len(truth))
+        
+        return {
+            'mode': self.mode,
+            'k': k,
+            'queries': len(sample),
+            'recall_at_k': round(float(np.mean(recalls)), 4) if recalls else 0.0,
+            'index_query_ms': round(index_time / max(len(sample), 1) * 1000, 3),
+            'exact_query_ms': round(exact_time / max(len(sample), 1) * 1000, 3)
+        }
+
+class RecommendationCache:
+    """
+    Thread-safe LRU cache (with optional TTL) for per-user recommendation lists
+    
+    Keys are (user_id, n_recommendations, model_version) tuples; bumping the
+    model version makes stale entries unreachable and LRU eviction drops them.
+    Entries for a user can also be invalidated explicitly.
+    """
+    
+    def __init__(self, max_size: int = 10000, ttl: Optional[float] = None):
+        """
+        Args:
+            max_size (int): Maximum number of cached lists
+            ttl (Optional[float]): Seconds an entry stays valid, None for no expiry
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._user_keys = {}
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get(self, key: Tuple):
+        """Cached value for key, or None on a miss or expired entry"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and time.monotonic() - entry[1] > self.ttl:
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+    
+    def put(self, key: Tuple, value):
+        """Store a value, evicting least recently used entries beyond max_size"""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            self._user_keys.setdefault(key[0], set()).add(key)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+    
+    def invalidate(self, user_id) -> int:
+        """Drop every cached entry for a user, returns the number of entries removed"""
+        with self._lock:
+            keys = list(self._user_keys.get(user_id, ()))
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+    
+    def clear(self):
+        """Drop all entries (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self._user_keys.clear()
+    
+    def _remove(self, key: Tuple):
+        self._entries.pop(key, None)
+        user_keys = self._user_keys.get(key[0])
+        if user_keys is not None:
+            user_keys.discard(key)
+            if not user_keys:
+                del self._user_keys[key[0]]
+    
+    def stats(self) -> Dict:
+        """Hit/miss/eviction counters and current size"""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+_PROFILER_LOCK = threading.Lock()
+
+def _instrumented(method: Callable) -> Callable:
+    """Run a public JointMovieRecommender method as an instrumentation request"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.instrumentation.request(method.__name__):
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class Instrumentation:
+    """
+    Stage timers, counters and sampled request profiling
+    
+    Timers and counters are a dict update under a lock, cheap enough to leave
+    on in production. Every measurement is also passed to the registered
+    sinks, callables taking (kind, name, value) with kind 'timer' (seconds) or
+    'counter', e.g. to forward them to StatsD or Prometheus. With
+    profile_sample_rate > 0 that share of top-level requests runs under
+    cProfile, and the profiles of those slower than slow_request_ms are kept
+    in slow_profiles.
+    """
+    
+    def __init__(self, enabled: bool = True, profile_sample_rate: float = 0.0,
+                 slow_request_ms: float = 100.0, max_profiles: int = 20, random_state: Optional[int] = None):
+        """
+        Args:
+            enabled (bool): Record anything at all
+            profile_sample_rate (float): Share of requests run under cProfile (0 disables profiling)
+            slow_request_ms (float): Profiled requests at least this slow are kept
+            max_profiles (int): Most recent slow profiles kept
+            random_state (Optional[int]): Seed for the profiling sample
+        """
+        self.enabled = enabled
+        self.profile_sample_rate = profile_sample_rate
+        self.slow_request_ms = slow_request_ms
+        self.sinks: List[Callable[[str, str, float], None]] = []
+        self.timers: Dict[str, List[float]] = {}
+        self.counters: Dict[str, int] = {}
+        self.slow_profiles = deque(maxlen=max_profiles)
+        self._random = random.Random(random_state)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+    
+    def add_sink(self, sink: Callable[[str, str, float], None]):
+        """Register a callable receiving every (kind, name, value) measurement"""
+        self.sinks.append(sink)
+    
+    def _emit(self, kind: str, name: str, value: float):
+        for sink in self.sinks:
+            try:
+                sink(kind, name, value)
+            except Exception:
+                logger.exception("Metrics sink %r failed", sink)
+    
+    def record_time(self, name: str, seconds: float):
+        """Add one duration to a stage timer"""
+        if not self.enabled:
+            return
+        with self._lock:
+            stats = self.timers.setdefault(name, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds)
+        self._emit('timer', name, seconds)
+    
+    def increment(self, name: str, value: int = 1):
+        """Add to a counter"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+        self._emit('counter', name, value)
+    
+    @contextmanager
+    def timer(self, name: str):
+        """Time the enclosed block as stage name"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_time(name, time.perf_counter() - start)
+    
+    @contextmanager
+    def request(self, name: str):
+        """
+        Time a public call as 'request.<name>', possibly under cProfile
+        
+        Calls nested in another request (recommend_for_couple calling
+        recommend_for_individual) are timed but never profiled separately.
+        """
+        depth = getattr(self._local, 'depth', 0)
+        if not self.enabled or depth:
+            self._local.depth = depth + 1
+            try:
+                with self.timer(f'request.{name}'):
+                    yield
+            finally:
+                self._local.depth = depth
+            return
+        
+        # Only one cProfile session can run per process, requests racing for it go unprofiled
+        profiler = None
+        if (self.profile_sample_rate and self._random.random() < self.profile_sample_rate
+                and _PROFILER_LOCK.acquire(blocking=False)):
+            profiler = cProfile.Profile()
+        self._local.depth = 1
+        start = time.perf_counter()
+        try:
+            if profiler is not None:
+                profiler.enable()
+            yield
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                _PROFILER_LOCK.release()
+            self._local.depth = 0
+            seconds = time.perf_counter() - start
+            self.record_time(f'request.{name}', seconds)
+            if profiler is not None and seconds * 1000 >= self.slow_request_ms:
+                report = io.StringIO()
+                pstats.Stats(profiler, stream=report).sort_stats('cumulative').print_stats(30)
+                self.slow_profiles.append({
+                    'request': name,
+                    'duration_ms': round(seconds * 1000, 3),
+                    'timestamp': time.time(),
+                    'profile': report.getvalue()
+                })
+                self.increment('slow_requests_profiled')
+    
+    def snapshot(self) -> Dict:
+        """Current timer (count, total/mean/max ms) and counter values"""
+        with self._lock:
+            timers = {
+                name: {'count': int(count), 'total_ms': round(total * 1000, 3),
+                       'mean_ms': round(total * 1000 / count, 3), 'max_ms': round(longest * 1000, 3)}
+                for name, (count, total, longest) in self.timers.items()
+            }
+            counters = dict(self.counters)
+        return {'timers': timers, 'counters': counters, 'slow_profiles': len(self.slow_profiles)}
+    
+    def reset(self):
+        """Clear timers, counters and kept profiles"""
+        with self._lock:
+            self.timers.clear()
+            self.counters.clear()
+            self.slow_profiles.clear()
+
 
 class JointMovieRecommender:
     """
@@ -28,50 +666,611 @@ class JointMovieRecommender:
     content-based filtering, and novel group recommendation techniques.
     """
     
-    def __init__(self, ratings_df: pd.DataFrame, movies_df: pd.DataFrame):
+    LIKED_RATING = 4.0      # Neighbour ratings at or above this count as recommendations
+    MIN_RECOMMENDERS = 3    # Minimum number of neighbours that must recommend a movie
+    INDIVIDUAL_CANDIDATES = 50  # Individual list size merged by the couple/group methods
+    FACTOR_CANDIDATE_POOL = 500  # Best-scoring movies per user kept by the batch 'nmf' scorer
+    MIN_COMMON_MOVIES = 5  # Co-rated movies needed before two users are compared
+    SIMILAR_MOVIES = 50  # Neighbours per movie in the content similarity table
+    DIVERSITY_CANDIDATE_POOL = 500  # Best-scoring movies re-ranked when diversity > 0
+    MEMBER_SCORE_CACHE_SIZE = 64  # Users whose full candidate scores are kept for explanations
+    PARALLEL_MIN_USERS = 256  # Fewest users per worker task when batch scoring with n_jobs > 1
+    PARALLEL_MIN_MOVIES = 20000  # Smaller similarity tables build faster than worker start-up
+    ENGINES = ('knn', 'nmf', 'content')
+    COUPLE_METHODS = ('intersection', 'weighted', 'least_misery', 'hybrid')
+    GROUP_STRATEGIES = ('average', 'least_misery', 'most_pleasure', 'weighted', 'borda')
+    # Model state written by save() / restored by load()
+    SNAPSHOT_CONFIG = ('n_neighbours', 'neighbour_index_mode', 'engine', 'n_factors', 'content_weight',
+                       'n_jobs', 'model_version')
+    SNAPSHOT_ARRAYS = ('user_movie_matrix', 'movie_user_matrix', 'rating_time_slots', 'hour_activity',
+                       'weekday_activity', 'movie_metadata_rows',
+                       'genre_names', 'movie_genre_matrix', 'movie_features_matrix',
+                       'user_factors', 'item_factors', 'item_similarity')
+    DAY_NAMES = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+    
+    def __init__(self, ratings_df: Union[pd.DataFrame, Dict[str, np.ndarray]], movies_df: pd.DataFrame,
+                 n_neighbours: int = 50, neighbour_index: str = 'exact',
+                 cache_size: int = 10000, cache_ttl: Optional[float] = None,
+                 engine: str = 'knn', n_factors: int = 32, content_weight: float = 0.0,
+                 n_jobs: Optional[int] = None, instrumentation: Optional[Instrumentation] = None):
         """
         Initialize the Joint Recommender
         
         Args:
-            ratings_df (pd.DataFrame): User ratings data (user_id, movie_id, rating, timestamp)
+            ratings_df (Union[pd.DataFrame, Dict[str, np.ndarray]]): User ratings data (user_id, movie_id,
+                rating, timestamp), a DataFrame or column arrays from data_preprocessing.read_rating_columns;
+                only used to build the rating store, not kept afterwards
             movies_df (pd.DataFrame): Movie metadata (movie_id, title, genres, year)
+            n_neighbours (int): Number of similar users used for collaborative filtering
+            neighbour_index (str): Similar-user search, 'exact' or approximate 'ivf'
+            cache_size (int): Individual recommendation lists kept in the LRU cache (0 disables it)
+            cache_ttl (Optional[float]): Seconds a cached list stays valid, None for no expiry
+            engine (str): Scoring engine, 'knn' (similar users), 'nmf' (latent factors) or
+                'content' (movies similar to the user's rated ones by TF-IDF genre/decade features)
+            n_factors (int): Number of latent factors for the 'nmf' engine
+            content_weight (float): Share of content-based scores blended into 'knn'/'nmf' ones
+                (users without collaborative candidates always fall back to content)
+            n_jobs (Optional[int]): Worker processes for the item similarity table and batch scoring
+                (None/1 runs in-process, -1 uses every core)
+            instrumentation (Optional[Instrumentation]): Timers/counters/sinks (a fresh one by default)
         """
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unknown engine '{engine}', expected one of {self.ENGINES}")
         self.ratings_df = ratings_df
         self.movies_df = movies_df
+        self.n_neighbours = n_neighbours
+        self.neighbour_index_mode = neighbour_index
+        self.engine = engine
+        self.n_factors = n_factors
+        self.content_weight = content_weight
+        self.n_jobs = n_jobs
         self.user_movie_matrix = None
+        self.movie_user_matrix = None
+        self.user_index = None
+        self.movie_index = None
+        self.neighbour_index = None
+        self.movie_metadata = None
+        self.movie_metadata_rows = None
+        self.rating_time_slots = None
+        self.hour_activity = None
+        self.weekday_activity = None
+        self.genre_names = None
+        self.movie_genre_matrix = None
         self.movie_features_matrix = None
+        self.user_factors = None
+        self.item_factors = None
+        self.item_similarity = None
+        self._item_similarity_binary = None
+        self.model_version = 0
+        self.recommendation_cache = RecommendationCache(cache_size, cache_ttl)
+        self._member_score_cache = RecommendationCache(self.MEMBER_SCORE_CACHE_SIZE, cache_ttl)
+        self.instrumentation = instrumentation or Instrumentation()
+        self._snapshot_source = None
+        self._workers = None
+        self._column_feature_cache = None
         self.setup_matrices()
+        # The rating matrix is the source of truth from here on, incremental
+        # updates do not maintain a copy of the input ratings
+        self.ratings_df = None
         
     def setup_matrices(self):
         """Setup user-movie matrix and movie features matrix"""
-        print("🔄 Setting up recommendation matrices...")
-        
-        # Create user-movie rating matrix
-        self.user_movie_matrix = self.ratings_df.pivot_table(
-            index='user_id', 
-            columns='movie_id', 
-            values='rating',
-            fill_value=0
-        )
+        logger.info("🔄 Setting up recommendation matrices...")
+        
+        timer = self.instrumentation.timer
+        
+        # Create sparse user-movie rating matrix (CSR, users x movies)
+        with timer('setup.rating_matrix'):
+            self.setup_rating_matrix()
+            self.setup_viewing_patterns()
+            self.setup_movie_lookup()
+            self.setup_genre_matrix()
+        
+        # Precompute the similar-user index
+        with timer('setup.neighbour_index'):
+            self.neighbour_index = UserNeighbourIndex(self.user_movie_matrix, mode=self.neighbour_index_mode)
+        
+        # Fit latent factors for the matrix factorization engine
+        if self.engine == 'nmf':
+            with timer('setup.factors'):
+                self.setup_factors()
         
         # Create movie features matrix using genres
-        self.setup_movie_features()
-        print("✅ Matrices setup complete!")
+        with timer('setup.movie_features'):
+            self.setup_movie_features()
+            self.setup_item_similarities()
+        logger.info("✅ Matrices setup complete!")
         
+    def setup_rating_matrix(self):
+        """
+        Build the sparse user-movie rating matrix in a single vectorized pass
+        
+        Rows follow sorted user ids and columns follow sorted movie ids (every
+        catalog movie gets a column, rated or not). Memory scales with the number
+        of ratings instead of users x movies; duplicate (user, movie) ratings are
+        averaged, matching the previous pivot_table behaviour. ratings_df may also
+        be a mapping of column arrays (see data_preprocessing.read_rating_columns),
+        indices and ratings are kept as int32/float32 throughout.
+        """
+        ratings_df = self.ratings_df
+        # Dense indices via searchsorted, cheaper than np.unique's int64 inverse on large inputs
+        rated_user_ids = np.asarray(ratings_df['user_id'])
+        rated_movie_ids = np.asarray(ratings_df['movie_id'])
+        user_ids = np.unique(rated_user_ids)
+        movie_ids = np.unique(np.concatenate([
+            self.movies_df['movie_id'].to_numpy(),
+            np.unique(rated_movie_ids)
+        ]))
+        self.user_index = IdIndex(user_ids)
+        self.movie_index = IdIndex(movie_ids)
+        rows = np.searchsorted(user_ids, rated_user_ids).astype(np.int32)
+        cols = np.searchsorted(movie_ids, rated_movie_ids).astype(np.int32)
+        
+        # A 0 rating means "not rated" in the matrix, drop those rows up front
+        ratings = np.asarray(ratings_df['rating'], dtype=np.float32)
+        rated = ratings != 0
+        if not rated.all():
+            rows, cols, ratings = rows[rated], cols[rated], ratings[rated]
+        shape = (len(user_ids), len(movie_ids))
+        
+        matrix = sparse.coo_matrix((ratings, (rows, cols)), shape=shape).tocsr()
+        counts = None
+        if matrix.nnz < len(ratings):
+            # Duplicates were summed by the COO -> CSR conversion, redo the sums in
+            # float64 and turn them into means
+            matrix = sparse.coo_matrix((ratings.astype(np.float64), (rows, cols)), shape=shape).tocsr()
+            counts = sparse.coo_matrix((np.ones(len(ratings)), (rows, cols)), shape=shape).tocsr()
+            matrix.data /= counts.data
+        self.user_movie_matrix = matrix.astype(np.float32, copy=False)
+        
+        # Weekday/hour slot of every rating, aligned with user_movie_matrix.data (same CSR
+        # structure); only these buckets are ever used, so full timestamps are not kept
+        self.rating_time_slots = None
+        if 'timestamp' in ratings_df:
+            timestamps = np.asarray(ratings_df['timestamp'])
+            if not rated.all():
+                timestamps = timestamps[rated]
+            if counts is None:
+                slot_matrix = sparse.coo_matrix((self._time_slots(timestamps), (rows, cols)), shape=shape)
+                self.rating_time_slots = slot_matrix.tocsr().data
+            else:
+                # Duplicate ratings take the slot of their mean timestamp
+                timestamp_matrix = sparse.coo_matrix((timestamps.astype(np.float64), (rows, cols)), shape=shape)
+                timestamp_matrix = timestamp_matrix.tocsr()
+                timestamp_matrix.data /= counts.data
+                self.rating_time_slots = self._time_slots(timestamp_matrix.data)
+        
+        # Inverted index: the users who rated each movie (movies x users CSR)
+        self.movie_user_matrix = self.user_movie_matrix.T.tocsr()
+    
+    def setup_viewing_patterns(self):
+        """
+        Count every user's ratings per hour of day (users x 24) and weekday (users x 7)
+        
+        One bincount over the ratings' weekday/hour slots (UTC); profiles and
+        recommend_watch_time read these rows instead of individual ratings, and
+        rating updates shift counts between buckets rather than recounting.
+        """
+        self.hour_activity = self.weekday_activity = None
+        if self.rating_time_slots is None:
+            return
+        n_users = self.user_movie_matrix.shape[0]
+        rows = np.repeat(np.arange(n_users, dtype=np.int64), np.diff(self.user_movie_matrix.indptr))
+        hours, weekdays = self._hour_and_weekday(self.rating_time_slots)
+        self.hour_activity = np.bincount(rows * 24 + hours, minlength=n_users * 24).reshape(n_users, 24).astype(np.int32)
+        self.weekday_activity = np.bincount(rows * 7 + weekdays, minlength=n_users * 7).reshape(n_users, 7).astype(np.int32)
+    
+    @staticmethod
+    def _time_slots(timestamps: np.ndarray) -> np.ndarray:
+        """Weekday (0 = Monday) * 24 + UTC hour of Unix timestamps, one byte each"""
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        weekdays = (timestamps // 86400 + 3) % 7  # 1970-01-01 was a Thursday
+        return (weekdays * 24 + (timestamps // 3600) % 24).astype(np.uint8)
+    
+    @staticmethod
+    def _hour_and_weekday(slots: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """UTC hour of day and weekday of _time_slots values"""
+        slots = np.asarray(slots, dtype=np.int64)
+        return slots % 24, slots // 24
+    
+    def setup_genre_matrix(self):
+        """Build the sparse movie x genre indicator matrix (rows aligned with rating matrix columns)"""
+        genres = self.movie_metadata['genres'].fillna('').astype(str).str.split('|').explode()
+        genres = genres[genres != '']
+        self.genre_names, genre_cols = np.unique(genres.to_numpy(dtype=str), return_inverse=True)
+        movie_cols = self.movie_index.lookup(genres.index.to_numpy())
+        self.movie_genre_matrix = sparse.csr_matrix(
+            (np.ones(len(genre_cols), dtype=np.float32), (movie_cols, genre_cols)),
+            shape=(len(self.movie_index), len(self.genre_names))
+        )
+        
+    def setup_movie_lookup(self):
+        """Index movie metadata by movie_id and align it with the rating matrix columns"""
+        self.movie_metadata = self.movies_df.drop_duplicates('movie_id').set_index('movie_id')
+        metadata_ids = IdIndex(self.movie_metadata.index.to_numpy())
+        self.movie_metadata_rows = metadata_ids.lookup(self.movie_index.ids)
+        
+    def _movie_records(self, cols: np.ndarray) -> List[Dict]:
+        """Basic movie info (movie_id, title, genres, year) for rating matrix columns"""
+        with self.instrumentation.timer('metadata_join'):
+            metadata = self.movie_metadata.iloc[self.movie_metadata_rows[cols]]
+            return [
+                {'movie_id': movie_id, 'title': title, 'genres': genres, 'year': year}
+                for movie_id, title, genres, year in zip(
+                    self.movie_index.ids[cols].tolist(), metadata['title'].tolist(),
+                    metadata['genres'].tolist(), metadata['year'].tolist()
+                )
+            ]
+    
+    def setup_factors(self):
+        """
+        Factorize the rating matrix with NMF (engine='nmf')
+        
+        Stores user_factors (users x n_factors) and item_factors (n_factors x movies),
+        so any predicted score is a dot product of two short vectors. Call again
+        to refit from scratch after many incremental updates.
+        """
+        nmf = NMF(n_components=self.n_factors, init='nndsvda', max_iter=200, random_state=42)
+        with warnings.catch_warnings():
+            # Stopping at max_iter is fine for ranking purposes
+            warnings.simplefilter('ignore', ConvergenceWarning)
+            self.user_factors = nmf.fit_transform(self.user_movie_matrix).astype(np.float32)
+        self.item_factors = nmf.components_.astype(np.float32)
+        
+    def _fold_in_user_factors(self, rows: np.ndarray, n_iter: int = 50):
+        """
+        Re-estimate factors of changed users against fixed item factors
+        
+        Uses the NMF multiplicative update for W only, so ingestion does not need
+        a refit; movies first seen after the fit get zero item factors.
+        """
+        new_movies = self.user_movie_matrix.shape[1] - self.item_factors.shape[1]
+        new_users = self.user_movie_matrix.shape[0] - self.user_factors.shape[0]
+        self.item_factors = np.pad(self.item_factors, ((0, 0), (0, new_movies)))
+        self.user_factors = np.concatenate([
+            self.user_factors, np.full((new_users, self.n_factors), 0.1, dtype=np.float32)
+        ])
+        
+        item_gram = self.item_factors @ self.item_factors.T
+        ratings_by_factor = np.asarray(self.user_movie_matrix[rows] @ self.item_factors.T)
+        factors = np.maximum(self.user_factors[rows], 1e-4)
+        for _ in range(n_iter):
+            factors *= ratings_by_factor / (factors @ item_gram + 1e-9)
+        self.user_factors[rows] = factors
+    
     def setup_movie_features(self):
         """Create TF-IDF matrix for movie genres and features"""
         # Combine genres and other features
         movies_features = self.movies_df.copy()
         movies_features['features'] = movies_features['genres'].fillna('')
         
-        # Add year as a feature (decade)
-        movies_features['decade'] = (movies_features['year'] // 10) * 10
-        movies_features['features'] += ' decade_' + movies_features['decade'].astype(str)
+        # Add year as a feature (decade), none for movies with an unknown year
+        years = pd.to_numeric(movies_features['year'], errors='coerce')
+        decades = ' decade_' + ((years // 10) * 10).astype('Int64').astype(str)
+        movies_features['features'] += decades.where(years.notna(), '')
         
         # Create TF-IDF matrix
         tfidf = TfidfVectorizer(stop_words='english')
         self.movie_features_matrix = tfidf.fit_transform(movies_features['features'])
         
+    def setup_item_similarities(self, k: Optional[int] = None, block_size: int = 256):
+        """
+        Precompute the k most similar movies of every movie from the TF-IDF features
+        
+        Cosine similarities between the column-aligned features (see
+        _column_features) are computed block_size movies at a time, so
+        peak memory is one block_size x movies dense block rather than the
+        full movies x movies matrix. With n_jobs > 1 the blocks are spread over
+        worker processes.
+        
+        Args:
+            k (Optional[int]): Similar movies kept per movie (defaults to SIMILAR_MOVIES)
+            block_size (int): Movies per block
+        """
+        k = k or self.SIMILAR_MOVIES
+        features = self._column_features()
+        features_t = features.T.tocsr()
+        
+        n_movies = features.shape[0]
+        k = min(k, n_movies - 1)
+        n_jobs = _resolve_n_jobs(self.n_jobs)
+        if n_jobs > 1 and n_movies >= self.PARALLEL_MIN_MOVIES:
+            # Workers memory-map the features from a scratch directory instead of unpickling them
+            chunk = -(-n_movies // (4 * n_jobs * block_size)) * block_size
+            starts = list(range(0, n_movies, chunk))
+            with tempfile.TemporaryDirectory(prefix='recommender-similarity-') as path:
+                entries = _save_snapshot_arrays(path, {'features': features, 'features_t': features_t})
+                with ProcessPoolExecutor(n_jobs, mp_context=_process_context()) as pool:
+                    parts = list(pool.map(_item_similarity_worker, [path] * len(starts), [entries] * len(starts),
+                                          starts, [chunk] * len(starts), [k] * len(starts),
+                                          [block_size] * len(starts)))
+        else:
+            parts = [_top_similar_items(features, features_t, 0, n_movies, k, block_size)]
+        counts, indices, similarities = (np.concatenate(part) for part in zip(*parts))
+        item_similarity = sparse.csr_matrix(
+            (similarities.astype(np.float32), indices, np.concatenate([[0], np.cumsum(counts)])),
+            shape=(n_movies, n_movies))
+        item_similarity.sort_indices()
+        self._set_item_similarity(item_similarity)
+    
+    def _set_item_similarity(self, item_similarity: sparse.csr_matrix):
+        """Store the similarity table and its 0/1 pattern (sharing indices) used for support counts"""
+        self.item_similarity = item_similarity
+        self._item_similarity_binary = sparse.csr_matrix(
+            (np.ones(item_similarity.nnz, dtype=np.float32), item_similarity.indices, item_similarity.indptr),
+            shape=item_similarity.shape)
+        
+    def _column_features(self) -> sparse.csr_matrix:
+        """
+        L2-normalized TF-IDF features (genres and decade) per rating matrix column
+        
+        Rows of movie_features_matrix follow movies_df, so they are aligned with
+        the matrix columns (zero rows for movies without metadata). Cached until
+        new movies get columns.
+        """
+        if self._column_feature_cache is None:
+            feature_rows = np.flatnonzero(~self.movies_df['movie_id'].duplicated().to_numpy())
+            has_metadata = self.movie_metadata_rows >= 0
+            features = self.movie_features_matrix[feature_rows[np.maximum(self.movie_metadata_rows, 0)]]
+            self._column_feature_cache = normalize(
+                sparse.diags(has_metadata.astype(np.float32)) @ features).astype(np.float32)
+        return self._column_feature_cache
+    
+    def save(self, path: str):
+        """
+        Write the fitted model to a snapshot directory
+        
+        Arrays are stored as individual .npy segments (sparse matrices as their
+        data/indices/indptr arrays) next to a versioned manifest.json, so load()
+        can memory-map them instead of rebuilding anything.
+        
+        Args:
+            path (str): Snapshot directory (created if needed)
+        """
+        os.makedirs(path, exist_ok=True)
+        arrays = {name: getattr(self, name) for name in self.SNAPSHOT_ARRAYS}
+        for prefix, index in (('user_index', self.user_index), ('movie_index', self.movie_index)):
+            arrays.update({f'{prefix}.{name}': value for name, value in index.to_arrays().items()})
+        index_config, index_arrays = self.neighbour_index.to_snapshot()
+        arrays.update({f'neighbour_index.{name}': value for name, value in index_arrays.items()})
+        
+        manifest = {
+            'format_version': SNAPSHOT_FORMAT_VERSION,
+            'config': {name: getattr(self, name) for name in self.SNAPSHOT_CONFIG},
+            'cache': {'max_size': self.recommendation_cache.max_size, 'ttl': self.recommendation_cache.ttl},
+            'neighbour_index': index_config,
+            'arrays': _save_snapshot_arrays(path, arrays)
+        }
+        self.movies_df.to_pickle(os.path.join(path, 'movies.pkl'))
+        with open(os.path.join(path, 'manifest.json'), 'w') as f:
+            json.dump(manifest, f, indent=2)
+    
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> 'JointMovieRecommender':
+        """
+        Open a snapshot written by save()
+        
+        With mmap=True the arrays are memory-mapped read-only, so worker processes
+        opening the same snapshot share its pages and start in well under a second.
+        add_ratings / remove_ratings still work: they write new in-memory arrays.
+        
+        Args:
+            path (str): Snapshot directory
+            mmap (bool): Memory-map arrays instead of reading them into memory
+            
+        Returns:
+            JointMovieRecommender: The restored recommender
+        """
+        with open(os.path.join(path, 'manifest.json')) as f:
+            manifest = json.load(f)
+        if manifest.get('format_version') != SNAPSHOT_FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot format {manifest.get('format_version')} "
+                             f"(expected {SNAPSHOT_FORMAT_VERSION})")
+        arrays = _load_snapshot_arrays(path, manifest['arrays'], mmap)
+        
+        recommender = cls.__new__(cls)
+        recommender.ratings_df = None
+        recommender.instrumentation = Instrumentation()
+        recommender.n_jobs = None
+        recommender._workers = None
+        recommender._column_feature_cache = None
+        recommender.movies_df = pd.read_pickle(os.path.join(path, 'movies.pkl'))
+        for name, value in manifest['config'].items():
+            setattr(recommender, name, value)
+        for name in cls.SNAPSHOT_ARRAYS:
+            setattr(recommender, name, arrays.get(name))
+        recommender.user_index = IdIndex.from_arrays(
+            arrays['user_index.ids'], arrays['user_index.order'], arrays['user_index.sorted_ids'])
+        recommender.movie_index = IdIndex.from_arrays(
+            arrays['movie_index.ids'], arrays['movie_index.order'], arrays['movie_index.sorted_ids'])
+        recommender._item_similarity_binary = None
+        if recommender.item_similarity is not None:
+            recommender._set_item_similarity(recommender.item_similarity)
+        recommender.neighbour_index = UserNeighbourIndex.from_snapshot(manifest['neighbour_index'], {
+            name.split('.', 1)[1]: value for name, value in arrays.items() if name.startswith('neighbour_index.')
+        })
+        recommender.movie_metadata = recommender.movies_df.drop_duplicates('movie_id').set_index('movie_id')
+        recommender.recommendation_cache = RecommendationCache(manifest['cache']['max_size'], manifest['cache']['ttl'])
+        recommender._member_score_cache = RecommendationCache(cls.MEMBER_SCORE_CACHE_SIZE, manifest['cache']['ttl'])
+        # Worker processes can map this snapshot directly until the model changes
+        recommender._snapshot_source = (os.path.abspath(path), recommender.model_version) if mmap else None
+        return recommender
+    
+    def _worker_pool(self, n_jobs: int) -> ProcessPoolExecutor:
+        """
+        Process pool whose workers memory-map a snapshot of the current model
+        
+        Workers open the snapshot load() came from while the model is unchanged,
+        otherwise the model is saved to a temporary directory first (again after
+        each add_ratings / remove_ratings), so they share its arrays through the
+        page cache instead of each receiving a pickled copy.
+        """
+        workers = self._workers
+        if workers is not None and workers['key'] == (self.model_version, n_jobs):
+            return workers['pool']
+        self.close()
+        
+        scratch_dir = None
+        if self._snapshot_source is not None and self._snapshot_source[1] == self.model_version:
+            path = self._snapshot_source[0]
+        else:
+            path = scratch_dir = tempfile.mkdtemp(prefix='recommender-workers-')
+            self.save(path)
+        pool = ProcessPoolExecutor(n_jobs, mp_context=_process_context(),
+                                   initializer=_init_worker, initargs=(path,))
+        self._workers = {
+            'key': (self.model_version, n_jobs),
+            'pool': pool,
+            'finalizer': weakref.finalize(self, _shutdown_workers, pool, scratch_dir)
+        }
+        return pool
+    
+    def close(self):
+        """Stop worker processes started for n_jobs and remove their temporary snapshot"""
+        if self._workers is not None:
+            self._workers['finalizer']()
+            self._workers = None
+    
+    @_instrumented
+    def add_ratings(self, ratings_df: pd.DataFrame) -> Dict:
+        """
+        Ingest new ratings without refitting the model
+        
+        New users and movies get new rows/columns, a rating for an existing
+        (user, movie) pair replaces the stored one. The rating store, neighbour
+        index norms and cached recommendations are updated in place.
+        
+        Args:
+            ratings_df (pd.DataFrame): New ratings (user_id, movie_id, rating[, timestamp])
+            
+        Returns:
+            Dict: Summary of the update
+        """
+        ratings_df = ratings_df.drop_duplicates(['user_id', 'movie_id'], keep='last')
+        ratings_df = ratings_df[ratings_df['rating'] != 0]
+        n_users, n_movies = len(self.user_index), len(self.movie_index)
+        rows = self.user_index.extend(ratings_df['user_id'].to_numpy())
+        cols = self.movie_index.extend(ratings_df['movie_id'].to_numpy())
+        self._resize_movie_columns()
+        
+        time_slots = None
+        if self.rating_time_slots is not None:
+            if 'timestamp' in ratings_df.columns:
+                timestamps = ratings_df['timestamp'].to_numpy(dtype=np.int64)
+            else:
+                timestamps = np.full(len(ratings_df), int(time.time()), dtype=np.int64)
+            time_slots = self._time_slots(timestamps)
+        self._update_rating_store(rows, cols, ratings_df['rating'].to_numpy(dtype=np.float32), time_slots)
+        
+        return {
+            'ratings_added': len(ratings_df),
+            'new_users': len(self.user_index) - n_users,
+            'new_movies': len(self.movie_index) - n_movies,
+            'model_version': self.model_version
+        }
+    
+    @_instrumented
+    def remove_ratings(self, ratings_df: pd.DataFrame) -> Dict:
+        """
+        Remove ratings without refitting the model
+        
+        Args:
+            ratings_df (pd.DataFrame): (user_id, movie_id) pairs to remove, unknown pairs are ignored
+            
+        Returns:
+            Dict: Summary of the update
+        """
+        rows = self.user_index.lookup(ratings_df['user_id'].to_numpy())
+        cols = self.movie_index.lookup(ratings_df['movie_id'].to_numpy())
+        known = (rows >= 0) & (cols >= 0)
+        nnz = self.user_movie_matrix.nnz
+        self._update_rating_store(rows[known], cols[known])
+        
+        return {
+            'ratings_removed': nnz - self.user_movie_matrix.nnz,
+            'model_version': self.model_version
+        }
+    
+    def _resize_movie_columns(self):
+        """Give movies first seen in new ratings a column (without metadata or genres)"""
+        added = len(self.movie_index) - len(self.movie_metadata_rows)
+        if added:
+            self._column_feature_cache = None
+            self.movie_metadata_rows = np.concatenate([self.movie_metadata_rows, np.full(added, -1)])
+            self.movie_genre_matrix = sparse.vstack([
+                self.movie_genre_matrix, sparse.csr_matrix((added, self.movie_genre_matrix.shape[1]))
+            ]).tocsr()
+            n_movies = len(self.movie_index)
+            item_similarity = self.item_similarity
+            self._set_item_similarity(sparse.csr_matrix(
+                (item_similarity.data, item_similarity.indices,
+                 np.pad(item_similarity.indptr, (0, added), mode='edge')), shape=(n_movies, n_movies)))
+    
+    def _update_rating_store(self, rows: np.ndarray, cols: np.ndarray,
+                             ratings: Optional[np.ndarray] = None, time_slots: Optional[np.ndarray] = None):
+        """
+        Upsert (ratings given) or delete (ratings None) entries of the rating matrix
+        
+        Entries are addressed by row-major keys; the CSR arrays are already sorted
+        by key, so new entries are merged in with searchsorted/insert rather than
+        rebuilding the matrix from scratch.
+        """
+        matrix = self.user_movie_matrix
+        shape = (len(self.user_index), len(self.movie_index))
+        old_rows = np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr))
+        old_keys = old_rows * shape[1] + matrix.indices
+        keys = np.asarray(rows, dtype=np.int64) * shape[1] + np.asarray(cols, dtype=np.int64)
+        
+        keep = ~np.isin(old_keys, keys)
+        if self.hour_activity is not None:
+            self._update_viewing_patterns(old_rows[~keep], self.rating_time_slots[~keep],
+                                          rows if ratings is not None else None, time_slots, shape[0])
+        old_keys, data, indices = old_keys[keep], matrix.data[keep], matrix.indices[keep]
+        rating_time_slots = self.rating_time_slots[keep] if self.rating_time_slots is not None else None
+        
+        if ratings is not None:
+            order = np.argsort(keys)
+            keys, ratings = keys[order], ratings[order]
+            insert_at = np.searchsorted(old_keys, keys)
+            old_keys = np.insert(old_keys, insert_at, keys)
+            data = np.insert(data, insert_at, ratings)
+            indices = np.insert(indices, insert_at, keys % shape[1])
+            if rating_time_slots is not None:
+                rating_time_slots = np.insert(rating_time_slots, insert_at, time_slots[order])
+        
+        indptr = np.concatenate([[0], np.cumsum(np.bincount(old_keys // shape[1], minlength=shape[0]))])
+        self.user_movie_matrix = sparse.csr_matrix((data.astype(np.float32), indices, indptr), shape=shape)
+        self.movie_user_matrix = self.user_movie_matrix.T.tocsr()
+        self.rating_time_slots = rating_time_slots
+        
+        changed_rows = np.unique(np.asarray(rows, dtype=np.int64))
+        self.neighbour_index.update(self.user_movie_matrix, changed_rows)
+        if self.engine == 'nmf':
+            self._fold_in_user_factors(changed_rows)
+        
+        # Any user's neighbourhood may have changed: retire every cached list
+        self.model_version += 1
+        for user_id in self.user_index.ids[changed_rows]:
+            self.recommendation_cache.invalidate(int(user_id))
+            self._member_score_cache.invalidate(int(user_id))
+    
+    def _update_viewing_patterns(self, removed_rows: np.ndarray, removed_slots: np.ndarray,
+                                 added_rows: Optional[np.ndarray], added_slots: Optional[np.ndarray],
+                                 n_users: int):
+        """Move replaced/deleted ratings out of their time buckets and new ones in"""
+        # np.pad copies, so memory-mapped snapshot arrays are never written to
+        hour_activity = np.pad(self.hour_activity, ((0, n_users - len(self.hour_activity)), (0, 0)))
+        weekday_activity = np.pad(self.weekday_activity, ((0, n_users - len(self.weekday_activity)), (0, 0)))
+        hours, weekdays = self._hour_and_weekday(removed_slots)
+        np.subtract.at(hour_activity, (removed_rows, hours), 1)
+        np.subtract.at(weekday_activity, (removed_rows, weekdays), 1)
+        if added_rows is not None:
+            hours, weekdays = self._hour_and_weekday(added_slots)
+            np.add.at(hour_activity, (added_rows, hours), 1)
+            np.add.at(weekday_activity, (added_rows, weekdays), 1)
+        self.hour_activity, self.weekday_activity = hour_activity, weekday_activity
+    
+    @_instrumented
     def get_user_profile(self, user_id: int) -> Dict:
         """
         Create a comprehensive profile for a user
@@ -82,52 +1281,163 @@ class JointMovieRecommender:
         Returns:
             Dict: User profile with preferences, statistics, and behavior patterns
         """
-        user_ratings = self.ratings_df[self.ratings_df['user_id'] == user_id]
+        return self.get_user_profiles([user_id])[user_id]
+    
+    @_instrumented
+    def get_user_profiles(self, user_ids: List[int]) -> Dict[int, Dict]:
+        """
+        Create profiles for many users at once
         
-        if user_ratings.empty:
-            return {"error": f"User {user_id} not found in dataset"}
+        Each user's ratings are a slice of the CSR rating matrix and genre
+        preferences for all requested users come from one sparse product with
+        the movie-genre matrix.
+        
+        Args:
+            user_ids (List[int]): User IDs
+            
+        Returns:
+            Dict[int, Dict]: Profile per user ID (an error dict for unknown users)
+        """
+        rows = self.user_index.lookup(user_ids)
+        profiles = {user_id: {"error": f"User {user_id} not found in dataset"}
+                    for user_id, row in zip(user_ids, rows) if row < 0}
+        known = [(user_id, row) for user_id, row in zip(user_ids, rows) if row >= 0]
+        if not known:
+            return profiles
         
-        # Get user's movie ratings with metadata
-        user_movies = user_ratings.merge(self.movies_df, on='movie_id')
+        genre_sums, genre_counts = self._genre_aggregates([row for _, row in known])
+        for (user_id, row), sums, counts in zip(known, genre_sums, genre_counts):
+            profiles[user_id] = self._build_user_profile(user_id, row, sums, counts)
+        return profiles
+    
+    def _genre_aggregates(self, rows: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """Genre rating sums and counts (users x genres) for many users from one sparse product each"""
+        user_ratings = self.user_movie_matrix[rows]
+        genre_sums = (user_ratings @ self.movie_genre_matrix).toarray()
+        user_ratings.data[:] = 1
+        genre_counts = (user_ratings @ self.movie_genre_matrix).toarray()
+        return genre_sums, genre_counts
+    
+    def _favorite_genres(self, genre_sums: np.ndarray, genre_counts: np.ndarray) -> np.ndarray:
+        """Up to five genres with the best mean rating among those rated at least 3 times"""
+        rated_genres = np.flatnonzero(genre_counts >= 3)  # Minimum 3 ratings
+        means = np.round(genre_sums[rated_genres] / genre_counts[rated_genres], 2)
+        return rated_genres[np.argsort(-means, kind='stable')][:5]
+    
+    def _build_user_profile(self, user_id: int, row: int, genre_sums: np.ndarray,
+                            genre_counts: np.ndarray) -> Dict:
+        """Assemble one profile from the user's rating slice and genre aggregates"""
+        start, end = self.user_movie_matrix.indptr[row], self.user_movie_matrix.indptr[row + 1]
+        if start == end:
+            return {"error": f"User {user_id} not found in dataset"}
+        cols = self.user_movie_matrix.indices[start:end]
+        ratings = self.user_movie_matrix.data[start:end].astype(np.float64)
         
         # Calculate basic statistics
+        values, value_counts = np.unique(ratings, return_counts=True)
+        by_count = np.argsort(-value_counts, kind='stable')
         profile = {
             'user_id': user_id,
-            'total_ratings': len(user_ratings),
-            'avg_rating': user_ratings['rating'].mean(),
-            'rating_std': user_ratings['rating'].std(),
-            'rating_distribution': user_ratings['rating'].value_counts().to_dict(),
+            'total_ratings': len(ratings),
+            'avg_rating': float(ratings.mean()),
+            'rating_std': float(ratings.std(ddof=1)) if len(ratings) > 1 else float('nan'),
+            'rating_distribution': dict(zip(values[by_count].tolist(), value_counts[by_count].tolist())),
         }
         
         # Genre preferences
-        genre_ratings = []
-        for _, movie in user_movies.iterrows():
-            genres = movie['genres'].split('|') if pd.notna(movie['genres']) else []
-            for genre in genres:
-                genre_ratings.append({'genre': genre, 'rating': movie['rating']})
-        
-        genre_df = pd.DataFrame(genre_ratings)
-        if not genre_df.empty:
-            genre_preferences = genre_df.groupby('genre')['rating'].agg(['mean', 'count']).round(2)
-            genre_preferences = genre_preferences[genre_preferences['count'] >= 3]  # Minimum 3 ratings
-            profile['favorite_genres'] = genre_preferences.sort_values('mean', ascending=False).head(5).to_dict('index')
+        if genre_counts.sum() > 0:
+            favorites = self._favorite_genres(genre_sums, genre_counts)
+            profile['favorite_genres'] = {
+                str(self.genre_names[genre]): {'mean': round(float(genre_sums[genre] / genre_counts[genre]), 2),
+                                          'count': int(genre_counts[genre])}
+                for genre in favorites
+            }
         
         # Temporal patterns
-        user_ratings['timestamp'] = pd.to_datetime(user_ratings['timestamp'], unit='s')
-        user_ratings['hour'] = user_ratings['timestamp'].dt.hour
-        user_ratings['day_of_week'] = user_ratings['timestamp'].dt.day_name()
-        
-        profile['viewing_patterns'] = {
-            'most_active_hours': user_ratings['hour'].value_counts().head(3).to_dict(),
-            'most_active_days': user_ratings['day_of_week'].value_counts().head(3).to_dict()
-        }
+        if self.hour_activity is not None:
+            profile['viewing_patterns'] = {
+                'most_active_hours': self._most_active(self.hour_activity[row], range(24)),
+                'most_active_days': self._most_active(self.weekday_activity[row], self.DAY_NAMES)
+            }
         
         # Top rated movies
-        top_movies = user_movies.nlargest(10, 'rating')[['title', 'rating', 'genres']]
-        profile['top_movies'] = top_movies.to_dict('records')
+        has_metadata = self.movie_metadata_rows[cols] >= 0
+        top = np.argsort(-ratings[has_metadata], kind='stable')[:10]
+        top_movies = self._movie_records(cols[has_metadata][top])
+        profile['top_movies'] = [
+            {'title': movie['title'], 'rating': float(rating), 'genres': movie['genres']}
+            for movie, rating in zip(top_movies, ratings[has_metadata][top])
+        ]
         
         return profile
     
+    @staticmethod
+    def _most_active(counts: np.ndarray, labels, n: int = 3) -> Dict:
+        """The n busiest time buckets with their rating counts, busiest first"""
+        order = np.argsort(-counts, kind='stable')[:n]
+        return {labels[bucket]: int(counts[bucket]) for bucket in order if counts[bucket] > 0}
+    
+    @_instrumented
+    def recommend_watch_time(self, user_ids: List[int], n_slots: int = 3) -> Dict:
+        """
+        Suggest when a couple or group should watch together
+        
+        Each member's share of ratings per weekday and per hour of day (UTC) are
+        multiplied into a share for every (weekday, hour) slot. A slot scores its
+        lowest member share, so the best slots are those where every member is
+        usually active; ties go to the higher mean share. Slots where some member
+        has never been active are not suggested, so members with no overlapping
+        activity get no slots (and a message saying so).
+        
+        Args:
+            user_ids (List[int]): Members of the couple or group
+            n_slots (int): Number of time slots to suggest
+            
+        Returns:
+            Dict: Suggested slots (day, hour, joint_activity, member_activity), the
+                hours every member is at least averagely active in, and hour_overlap,
+                the overlap of the members' hour-of-day distributions (0 to 1)
+        """
+        if len(user_ids) < 2:
+            return {"error": "Need at least 2 users to plan a joint watch time"}
+        if self.hour_activity is None:
+            return {"error": "Ratings have no timestamps"}
+        rows = self.user_index.lookup(user_ids)
+        if (rows < 0).any():
+            return {"error": "One or more users not found"}
+        hours = self.hour_activity[rows].astype(np.float64)
+        weekdays = self.weekday_activity[rows].astype(np.float64)
+        totals = hours.sum(axis=1, keepdims=True)
+        if (totals == 0).any():
+            return {"error": "One or more users have no ratings"}
+        hours /= totals
+        weekdays /= totals
+        
+        slot_shares = (weekdays[:, :, None] * hours[:, None, :]).reshape(len(rows), -1)  # members x (7 * 24)
+        joint = slot_shares.min(axis=0)
+        best = np.lexsort((-slot_shares.mean(axis=0), -joint))[:n_slots]
+        best = best[joint[best] > 0]
+        slots = [
+            {
+                'day': self.DAY_NAMES[slot // 24],
+                'hour': int(slot % 24),
+                'joint_activity': round(float(joint[slot]), 4),
+                'member_activity': {user_id: round(float(share), 4)
+                                    for user_id, share in zip(user_ids, slot_shares[:, slot])}
+            }
+            for slot in best
+        ]
+        result = {
+            'user_ids': list(user_ids),
+            'slots': slots,
+            'shared_active_hours': np.flatnonzero((hours >= 1 / 24).all(axis=0)).tolist(),
+            'hour_overlap': round(float(hours.min(axis=0).sum()), 3)
+        }
+        if not slots:
+            result['message'] = "No weekday/hour slot where every member has been active"
+        return result
+    
+    @_instrumented
     def calculate_user_similarity(self, user1_id: int, user2_id: int) -> Dict:
         """
         Calculate similarity between two users
@@ -140,37 +1450,39 @@ class JointMovieRecommender:
             Dict: Similarity metrics and analysis
         """
         # Get user rating vectors
-        if user1_id not in self.user_movie_matrix.index or user2_id not in self.user_movie_matrix.index:
+        user1_row = self.user_index.get(user1_id)
+        user2_row = self.user_index.get(user2_id)
+        if user1_row is None or user2_row is None:
             return {"error": "One or both users not found"}
         
-        user1_ratings = self.user_movie_matrix.loc[user1_id]
-        user2_ratings = self.user_movie_matrix.loc[user2_id]
+        user1_ratings = self.user_movie_matrix[user1_row]
+        user2_ratings = self.user_movie_matrix[user2_row]
         
         # Find commonly rated movies
-        common_movies = (user1_ratings > 0) & (user2_ratings > 0)
-        common_count = common_movies.sum()
+        _, idx1, idx2 = np.intersect1d(
+            user1_ratings.indices, user2_ratings.indices, assume_unique=True, return_indices=True
+        )
+        common_count = len(idx1)
         
-        if common_count < 5:
-            return {"error": "Not enough common movies (minimum 5 required)"}
+        if common_count < self.MIN_COMMON_MOVIES:
+            return {"error": f"Not enough common movies (minimum {self.MIN_COMMON_MOVIES} required)"}
         
         # Calculate similarities
-        user1_common = user1_ratings[common_movies]
-        user2_common = user2_ratings[common_movies]
+        user1_common = user1_ratings.data[idx1].astype(np.float64)
+        user2_common = user2_ratings.data[idx2].astype(np.float64)
         
         # Cosine similarity
         cosine_sim = cosine_similarity([user1_common], [user2_common])[0][0]
         
         # Pearson correlation
-        pearson_corr = np.corrcoef(user1_common, user2_common)[0][1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # NaN when either user gave every common movie the same rating
+            pearson_corr = np.corrcoef(user1_common, user2_common)[0][1]
         
         # Rating difference analysis
         rating_diff = np.abs(user1_common - user2_common)
         avg_diff = rating_diff.mean()
         
-        # Genre preference similarity
-        profile1 = self.get_user_profile(user1_id)
-        profile2 = self.get_user_profile(user2_id)
-        
         similarity_report = {
             'cosine_similarity': round(cosine_sim, 3),
             'pearson_correlation': round(pearson_corr, 3),
@@ -182,6 +1494,191 @@ class JointMovieRecommender:
         
         return similarity_report
     
+    @_instrumented
+    def calculate_group_compatibility(self, user_ids: List[int]) -> pd.DataFrame:
+        """
+        Calculate the calculate_user_similarity metrics for every pair in a group at once
+        
+        Args:
+            user_ids (List[int]): Group member user IDs (unknown users are skipped)
+            
+        Returns:
+            pd.DataFrame: One row per pair (user1_id, user2_id, common_movies_count,
+                cosine_similarity, pearson_correlation, avg_rating_difference,
+                compatibility_score), pairs with too few common movies left out
+        """
+        user_ids = list(dict.fromkeys(user_ids))
+        rows = self.user_index.lookup(user_ids)
+        members = np.array(user_ids, dtype=object)[rows >= 0]
+        rows = rows[rows >= 0]
+        
+        stats = self._compatibility_statistics(rows, rows)
+        first, second = np.triu_indices(len(rows), k=1)
+        keep = stats['common'][first, second] >= self.MIN_COMMON_MOVIES
+        first, second = first[keep], second[keep]
+        return pd.DataFrame({
+            'user1_id': members[first].tolist(),
+            'user2_id': members[second].tolist(),
+            'common_movies_count': stats['common'][first, second].astype(np.int64),
+            'cosine_similarity': np.round(stats['cosine'][first, second], 3),
+            'pearson_correlation': np.round(stats['pearson'][first, second], 3),
+            'avg_rating_difference': np.round(stats['avg_difference'][first, second], 2),
+            'compatibility_score': np.round(stats['compatibility'][first, second], 3)
+        })
+    
+    @_instrumented
+    def find_best_partner(self, user_id: int, friend_ids: List[int]) -> Dict:
+        """
+        Rank a user's friends by movie compatibility
+        
+        Args:
+            user_id (int): User looking for a movie partner
+            friend_ids (List[int]): Candidate partners
+            
+        Returns:
+            Dict: Best partner and the full ranking (friends with too few common movies left out)
+        """
+        user_row = self.user_index.get(user_id)
+        if user_row is None:
+            return {"error": "User not found"}
+        
+        friend_ids = [friend_id for friend_id in dict.fromkeys(friend_ids) if friend_id != user_id]
+        friend_rows = self.user_index.lookup(friend_ids)
+        friend_ids = np.array(friend_ids, dtype=object)[friend_rows >= 0]
+        friend_rows = friend_rows[friend_rows >= 0]
+        
+        stats = {name: values[0] for name, values in
+                 self._compatibility_statistics(np.array([user_row]), friend_rows).items()}
+        candidates = np.flatnonzero(stats['common'] >= self.MIN_COMMON_MOVIES)
+        order = candidates[np.argsort(-stats['compatibility'][candidates], kind='stable')]
+        ranking = self._partner_records(friend_ids[order].tolist(), {name: values[order] for name, values in stats.items()})
+        
+        return {
+            'user_id': user_id,
+            'best_partner': ranking[0]['user_id'] if ranking else None,
+            'ranking': ranking
+        }
+    
+    @_instrumented
+    def find_compatible_partners(self, user_id: int, n_partners: int = 20,
+                                 min_common: Optional[int] = None) -> List[Dict]:
+        """
+        Find the users most compatible with a user across the whole user base
+        
+        Uses the compatibility_score of calculate_user_similarity. Candidates come
+        from the inverted movie -> users index: only users sharing a rated movie
+        are touched, and their co-rating sums are accumulated with one bincount
+        per statistic over the gathered (user, rating) entries. The pairwise
+        statistics are computed per query rather than precomputed: a table of
+        them grows with users squared, and even a top-k partner table would
+        need one such query per user whenever ratings change.
+        
+        Args:
+            user_id (int): User looking for partners
+            n_partners (int): Number of partners to return
+            min_common (Optional[int]): Minimum co-rated movies (defaults to MIN_COMMON_MOVIES)
+            
+        Returns:
+            List[Dict]: Partners, most compatible first
+        """
+        user_row = self.user_index.get(user_id)
+        if user_row is None:
+            return []
+        min_common = self.MIN_COMMON_MOVIES if min_common is None else min_common
+        
+        # Gather every (other user, their rating, our rating) on our movies
+        user_ratings = self.user_movie_matrix[user_row]
+        starts = self.movie_user_matrix.indptr[user_ratings.indices]
+        lengths = self.movie_user_matrix.indptr[user_ratings.indices + 1] - starts
+        positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        others = self.movie_user_matrix.indices[positions]
+        y = self.movie_user_matrix.data[positions].astype(np.float64)
+        x = np.repeat(user_ratings.data.astype(np.float64), lengths)
+        
+        n_users = self.user_movie_matrix.shape[0]
+        common = np.bincount(others, minlength=n_users)
+        common[user_row] = 0
+        candidates = np.flatnonzero(common >= max(min_common, 1))
+        if not len(candidates):
+            return []
+        
+        def co_rated_sum(values):
+            return np.bincount(others, weights=values, minlength=n_users)[candidates]
+        
+        common = common[candidates]
+        cosine = co_rated_sum(x * y) / np.sqrt(co_rated_sum(x * x) * co_rated_sum(y * y))
+        avg_difference = co_rated_sum(np.abs(x - y)) / common
+        compatibility = (cosine + (1 - avg_difference / 4)) / 2
+        
+        # Best n by rounded score, ties by user id
+        rounded = np.round(compatibility, 3)
+        top = np.arange(len(candidates))
+        if len(candidates) > n_partners:
+            top = np.flatnonzero(rounded >= np.partition(rounded, -n_partners)[-n_partners])
+        top = top[np.lexsort((candidates[top], -rounded[top]))][:n_partners]
+        return self._partner_records(self.user_index.ids[candidates[top]].tolist(), {
+            'common': common[top], 'cosine': cosine[top],
+            'avg_difference': avg_difference[top], 'compatibility': compatibility[top]
+        })
+    
+    def _partner_records(self, partner_ids: List[int], stats: Dict[str, np.ndarray]) -> List[Dict]:
+        """Partner dicts from compatibility statistics aligned with partner_ids"""
+        return [{
+            'user_id': partner_id,
+            'compatibility_score': round(float(compatibility), 3),
+            'cosine_similarity': round(float(cosine), 3),
+            'common_movies_count': int(common),
+            'avg_rating_difference': round(float(avg_difference), 2),
+            'similarity_level': self._classify_similarity(cosine)
+        } for partner_id, common, cosine, avg_difference, compatibility in zip(
+            partner_ids, stats['common'], stats['cosine'], stats['avg_difference'], stats['compatibility'])]
+    
+    def _compatibility_statistics(self, rows_a: np.ndarray, rows_b: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Co-rating statistics for every (a, b) pair of users via sparse products
+        
+        With R the ratings and B their indicator, R_a @ B_b.T sums a's ratings over
+        the movies both users rated, B_a @ B_b.T counts those movies, and so on,
+        so cosine and Pearson on co-rated movies need no per-pair masking. The
+        mean absolute difference uses |x - y| = x + y - 2 min(x, y), where the
+        sum of min(x, y) is a layer cake over the distinct rating values:
+        sum over levels v of (v - previous level) * [x >= v] @ [y >= v].
+        
+        Returns:
+            Dict[str, np.ndarray]: len(rows_a) x len(rows_b) matrices 'common', 'cosine',
+                'pearson', 'avg_difference' and 'compatibility' (NaN below MIN_COMMON_MOVIES)
+        """
+        ratings_a = self.user_movie_matrix[rows_a].astype(np.float64)
+        ratings_b = self.user_movie_matrix[rows_b].astype(np.float64)
+        rated_a, rated_b = ratings_a.copy(), ratings_b.copy()
+        rated_a.data[:] = 1
+        rated_b.data[:] = 1
+        
+        common = (rated_a @ rated_b.T).toarray()
+        sum_xy = (ratings_a @ ratings_b.T).toarray()
+        sum_x = (ratings_a @ rated_b.T).toarray()
+        sum_y = (rated_a @ ratings_b.T).toarray()
+        sum_xx = (ratings_a.power(2) @ rated_b.T).toarray()
+        sum_yy = (rated_a @ ratings_b.power(2).T).toarray()
+        
+        levels = np.unique(np.concatenate([ratings_a.data, ratings_b.data]))
+        sum_min = np.zeros_like(common)
+        for level, step in zip(levels, np.diff(levels, prepend=0)):
+            sum_min += step * ((ratings_a >= level).astype(np.float64) @ (ratings_b >= level).T).toarray()
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cosine = sum_xy / np.sqrt(sum_xx * sum_yy)
+            pearson = np.clip((common * sum_xy - sum_x * sum_y) / np.sqrt(
+                (common * sum_xx - sum_x ** 2) * (common * sum_yy - sum_y ** 2)), -1, 1)
+            avg_difference = (sum_x + sum_y - 2 * sum_min) / common
+        compatibility = (cosine + (1 - avg_difference / 4)) / 2
+        
+        too_few = common < self.MIN_COMMON_MOVIES
+        for matrix in (cosine, pearson, avg_difference, compatibility):
+            matrix[too_few] = np.nan
+        return {'common': common, 'cosine': cosine, 'pearson': pearson,
+                'avg_difference': avg_difference, 'compatibility': compatibility}
+    
     def _classify_similarity(self, similarity_score: float) -> str:
         """Classify similarity score into categories"""
         if similarity_score >= 0.8:
@@ -195,6 +1692,7 @@ class JointMovieRecommender:
         else:
             return "Very Low - Opposite tastes! 😅"
     
+    @_instrumented
     def recommend_for_individual(self, user_id: int, n_recommendations: int = 20) -> List[Dict]:
         """
         Generate individual recommendations using collaborative filtering
@@ -206,54 +1704,188 @@ class JointMovieRecommender:
         Returns:
             List[Dict]: Recommended movies with scores and explanations
         """
-        if user_id not in self.user_movie_matrix.index:
+        cache_key = (user_id, n_recommendations, self.model_version)
+        cached = self.recommendation_cache.get(cache_key)
+        if cached is None:
+            self.instrumentation.increment('cache_misses')
+            cached = self._recommend_for_individual(user_id, n_recommendations)
+            self.recommendation_cache.put(cache_key, cached)
+        else:
+            self.instrumentation.increment('cache_hits')
+        return [dict(rec) for rec in cached]
+    
+    def _recommend_for_individual(self, user_id: int, n_recommendations: int) -> List[Dict]:
+        """Uncached individual recommendations, see recommend_for_individual"""
+        user_row = self.user_index.get(user_id)
+        if user_row is None:
             return []
         
-        user_ratings = self.user_movie_matrix.loc[user_id]
+        # Score every candidate movie, kept so explanations can reuse them
+        cols, predicted, confidence = self._member_scores(user_id, user_row)
         
-        # Find similar users using cosine similarity
-        user_similarities = cosine_similarity([user_ratings], self.user_movie_matrix)[0]
-        similar_users_idx = np.argsort(user_similarities)[::-1][1:51]  # Top 50 similar users
+        # Sort by predicted rating and return top N
+        rounded = self._round_scores(predicted.astype(np.float64))
+        top = np.lexsort((cols, -rounded))[:n_recommendations]
         
-        # Get recommendations from similar users
-        recommendations = {}
-        for similar_user_idx in similar_users_idx:
-            similar_user_id = self.user_movie_matrix.index[similar_user_idx]
-            similar_user_ratings = self.user_movie_matrix.iloc[similar_user_idx]
-            similarity_score = user_similarities[similar_user_idx]
-            
-            # Find movies rated highly by similar user but not rated by target user
-            unrated_movies = (user_ratings == 0) & (similar_user_ratings >= 4.0)
+        final_recommendations = []
+        for movie_info, score, rounded_score, certainty in zip(
+                self._movie_records(cols[top]), predicted[top], rounded[top], confidence[top]):
+            final_recommendations.append({
+                **movie_info,
+                'predicted_rating': float(rounded_score),
+                'confidence': round(float(certainty), 2),
+                'recommendation_reason': self._recommendation_reason(score)
+            })
+        return final_recommendations
+    
+    def _member_scores(self, user_id: int, user_row: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """_score_candidates for one user (columns in ascending order), cached per model version"""
+        cache_key = (user_id, self.model_version)
+        scores = self._member_score_cache.get(cache_key)
+        if scores is None:
+            scores = self._score_candidates(user_row)
+            self._member_score_cache.put(cache_key, scores)
+        return scores
+    
+    def _recommendation_reason(self, score: float) -> str:
+        """Explanation text for an individual recommendation"""
+        if self.engine == 'nmf':
+            return f"Fits your taste profile, predicted {score:.1f}/5.0"
+        if self.engine == 'content':
+            return f"Similar to movies you rated highly ({score:.1f})"
+        return f"Users with similar taste rated this {score:.1f}/5.0"
+    
+    def _score_candidates(self, user_row: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Aggregate similar users' ratings into candidate scores for one user
+        
+        A movie is a candidate when at least MIN_RECOMMENDERS neighbours rated it
+        LIKED_RATING or higher and the user has not rated it. Its score is the mean
+        of similarity * rating over those neighbours, computed for all movies at
+        once from the neighbour submatrix.
+        
+        Args:
+            user_row (int): Matrix row of the user
             
-            for movie_id in self.user_movie_matrix.columns[unrated_movies]:
-                if movie_id not in recommendations:
-                    recommendations[movie_id] = []
-                recommendations[movie_id].append(similarity_score * similar_user_ratings[movie_id])
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: Candidate columns, predicted scores, confidences
+        """
+        if self.engine == 'knn':
+            with self.instrumentation.timer('neighbour_search'):
+                neighbours, similarities = self.neighbour_index.query(user_row, self.n_neighbours)
+        with self.instrumentation.timer('candidate_aggregation'):
+            if self.engine == 'content':
+                _, cols, predicted, confidence = self._content_scores(np.array([user_row]))
+            else:
+                if self.engine == 'knn':
+                    cols, predicted, confidence = self._aggregate_neighbour_ratings(user_row, neighbours, similarities)
+                else:
+                    cols, predicted, confidence = self._score_candidates_factors(user_row)
+                _, cols, predicted, confidence = self._with_content(
+                    np.array([user_row]), np.zeros(len(cols), dtype=np.int64), cols, predicted, confidence)
+        self.instrumentation.increment('candidates_considered', len(cols))
+        return cols, predicted, confidence
+    
+    def _aggregate_neighbour_ratings(self, user_row: int, neighbours: np.ndarray,
+                                     similarities: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Candidate scores for one user from its neighbours' liked ratings"""
+        neighbour_ratings = self.user_movie_matrix[neighbours]
+        liked = neighbour_ratings.multiply(neighbour_ratings >= self.LIKED_RATING).tocsr()
         
-        # Calculate final scores
-        final_recommendations = []
-        for movie_id, scores in recommendations.items():
-            if len(scores) >= 3:  # At least 3 similar users recommended it
-                avg_score = np.mean(scores)
-                confidence = len(scores) / 50.0  # Confidence based on number of recommenders
-                
-                movie_info = self.movies_df[self.movies_df['movie_id'] == movie_id].iloc[0]
-                final_recommendations.append({
-                    'movie_id': movie_id,
-                    'title': movie_info['title'],
-                    'genres': movie_info['genres'],
-                    'year': movie_info['year'],
-                    'predicted_rating': round(avg_score, 2),
-                    'confidence': round(confidence, 2),
-                    'recommendation_reason': f"Users with similar taste rated this {avg_score:.1f}/5.0"
-                })
+        weighted_sums = liked.T @ similarities.astype(np.float64)
+        counts = np.diff(liked.tocsc().indptr)
         
-        # Sort by predicted rating and return top N
-        final_recommendations.sort(key=lambda x: x['predicted_rating'], reverse=True)
-        return final_recommendations[:n_recommendations]
+        # Drop movies the user already rated and movies we have no metadata for
+        counts[self.user_movie_matrix[user_row].indices] = 0
+        counts[self.movie_metadata_rows < 0] = 0
+        
+        cols = np.flatnonzero(counts >= self.MIN_RECOMMENDERS)
+        support = counts[cols]
+        # Confidence based on number of recommenders
+        return cols, weighted_sums[cols] / support, support / self.n_neighbours
     
+    def _score_candidates_factors(self, user_row: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Latent-factor scores of every unseen movie for one user (engine='nmf')
+        
+        Confidence is the cosine between the user and item factor vectors, i.e.
+        how squarely the movie sits in the user's taste profile.
+        """
+        user_factors = self.user_factors[user_row]
+        scores = user_factors @ self.item_factors
+        scores[self.user_movie_matrix[user_row].indices] = 0
+        scores[self.movie_metadata_rows < 0] = 0
+        
+        cols = np.flatnonzero(scores > 0)
+        item_norms = np.linalg.norm(self.item_factors[:, cols], axis=0)
+        confidence = scores[cols] / (np.linalg.norm(user_factors) * item_norms)
+        return cols, np.clip(scores[cols], 0, 5), confidence
+    
+    def _content_scores(self, block_rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Content-based scores for a block of users from the item similarity table
+        
+        Mirrors the kNN score with similar movies in place of similar users: a
+        candidate's score is similarity * rating summed over the movies the user
+        liked that list it among their SIMILAR_MOVIES, divided by at least
+        MIN_RECOMMENDERS so one lucky match cannot outrank broad support. Its
+        confidence is the mean of those similarities.
+        
+        Returns:
+            Tuple: Row within block, candidate column, predicted score and confidence per candidate
+        """
+        ratings = self.user_movie_matrix[block_rows]
+        liked = ratings.multiply(ratings >= self.LIKED_RATING).tocsr()
+        liked_binary = liked.copy()
+        liked_binary.data[:] = 1
+        
+        weighted_sums = (liked @ self.item_similarity).tocsr()
+        similarity_sums = (liked_binary @ self.item_similarity).tocsr()
+        counts = (liked_binary @ self._item_similarity_binary).tocsr()
+        for matrix in (weighted_sums, similarity_sums, counts):
+            matrix.sort_indices()
+        
+        # Drop movies the user already rated and movies without metadata
+        n_movies = ratings.shape[1]
+        row = np.repeat(np.arange(len(block_rows)), np.diff(counts.indptr))
+        col = counts.indices
+        rated_keys = np.repeat(np.arange(len(block_rows)), np.diff(ratings.indptr)) * n_movies + ratings.indices
+        keep = ~np.isin(row * n_movies + col, rated_keys) & (self.movie_metadata_rows[col] >= 0)
+        support = counts.data[keep].astype(np.float64)
+        return (row[keep], col[keep], weighted_sums.data[keep] / np.maximum(support, self.MIN_RECOMMENDERS),
+                similarity_sums.data[keep] / support)
+    
+    def _with_content(self, block_rows: np.ndarray, row: np.ndarray, col: np.ndarray,
+                      predicted: np.ndarray, confidence: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Blend collaborative candidates of a block of users with content-based ones
+        
+        Scores are mixed with content_weight over the union of both candidate
+        sets (a movie missing from one side counts 0 there). Users with no
+        collaborative candidates at all (cold start, no shared neighbours) get
+        the content-based list on its own.
+        """
+        weight = np.full(len(block_rows), float(self.content_weight))
+        weight[np.bincount(row, minlength=len(block_rows)) == 0] = 1.0
+        if not weight.any():
+            return row, col, predicted, confidence
+        
+        content_row, content_col, content_predicted, content_confidence = self._content_scores(block_rows)
+        n_movies = self.user_movie_matrix.shape[1]
+        keys, inverse = np.unique(np.concatenate([row * n_movies + col, content_row * n_movies + content_col]),
+                                  return_inverse=True)
+        shares = np.concatenate([1 - weight[row], weight[content_row]])
+        blended_predicted = np.bincount(inverse, shares * np.concatenate([predicted, content_predicted]),
+                                        minlength=len(keys))
+        blended_confidence = np.bincount(inverse, shares * np.concatenate([confidence, content_confidence]),
+                                         minlength=len(keys))
+        keep = blended_predicted > 0
+        return keys[keep] // n_movies, keys[keep] % n_movies, blended_predicted[keep], blended_confidence[keep]
+    
+    @_instrumented
     def recommend_for_couple(self, user1_id: int, user2_id: int, 
-                           method: str = 'hybrid', n_recommendations: int = 15) -> List[Dict]:
+                           method: str = 'hybrid', n_recommendations: int = 15,
+                           diversity: float = 0.0) -> List[Dict]:
         """
         Generate joint recommendations for a couple
         
@@ -262,17 +1894,102 @@ class JointMovieRecommender:
             user2_id (int): Second user ID  
             method (str): Recommendation method ('intersection', 'weighted', 'least_misery', 'hybrid')
             n_recommendations (int): Number of recommendations
+            diversity (float): 0 ranks by score alone, up to 1 trades score for genre/decade
+                variety (see _diversify)
             
         Returns:
             List[Dict]: Joint recommendations with explanations
         """
         # Get individual recommendations
-        recs1 = self.recommend_for_individual(user1_id, 50)
-        recs2 = self.recommend_for_individual(user2_id, 50)
+        recs1 = self.recommend_for_individual(user1_id, self.INDIVIDUAL_CANDIDATES)
+        recs2 = self.recommend_for_individual(user2_id, self.INDIVIDUAL_CANDIDATES)
         
         if not recs1 or not recs2:
             return []
         
+        with self.instrumentation.timer('aggregation_strategy'):
+            joint_recommendations = self._combine_couple_recommendations(recs1, recs2, method)
+        if diversity:
+            joint_recommendations = joint_recommendations[:self.DIVERSITY_CANDIDATE_POOL]
+            score = 'hybrid_score' if method == 'hybrid' else 'joint_score'
+            picks = self._diversify(
+                self.movie_index.lookup([rec['movie_id'] for rec in joint_recommendations]),
+                np.array([rec[score] for rec in joint_recommendations], dtype=np.float64),
+                n_recommendations, diversity)
+            return [joint_recommendations[pick] for pick in picks]
+        return joint_recommendations[:n_recommendations]
+    
+    def _diversify(self, cols: np.ndarray, relevance: np.ndarray, n: int, diversity: float) -> np.ndarray:
+        """
+        Re-rank candidates with maximal marginal relevance
+        
+        Greedily picks the candidate maximizing
+        (1 - diversity) * relevance - diversity * (highest feature similarity to a
+        movie already picked), relevance min-max scaled to [0, 1]. Pairwise
+        similarities of the candidates come from one matrix product up front and
+        each step only folds the new pick's row into a running maximum, so a
+        step costs O(candidates).
+        
+        Args:
+            cols (np.ndarray): Matrix columns of the candidates, best first
+            relevance (np.ndarray): Candidate scores
+            n (int): Number of candidates to pick
+            diversity (float): Weight of novelty against relevance, 0 to 1
+            
+        Returns:
+            np.ndarray: Positions into cols in pick order
+        """
+        if not 0 <= diversity <= 1:
+            raise ValueError(f"diversity must be between 0 and 1, got {diversity}")
+        with self.instrumentation.timer('diversity_reranking'):
+            # A few dozen genre/decade terms: a dense product beats a sparse one here
+            features = self._column_features()[np.asarray(cols, dtype=np.int64)].toarray()
+            similarity = features @ features.T
+            spread = relevance.max(initial=0) - relevance.min(initial=0)
+            relevance = (relevance - relevance.min(initial=0)) / spread if spread > 0 else np.ones(len(cols))
+            
+            gain = (1 - diversity) * relevance
+            max_similarity = np.zeros(len(cols))
+            picks = []
+            for _ in range(min(n, len(cols))):
+                pick = int(np.argmax(gain - diversity * max_similarity))
+                picks.append(pick)
+                gain[pick] = -np.inf
+                np.maximum(max_similarity, similarity[pick], out=max_similarity)
+        return np.array(picks, dtype=np.int64)
+    
+    def invalidate_cache(self, user_id: Optional[int] = None):
+        """
+        Drop cached recommendation lists
+        
+        Args:
+            user_id (Optional[int]): Only drop this user's lists; None clears everything
+        """
+        if user_id is None:
+            self.recommendation_cache.clear()
+            self._member_score_cache.clear()
+        else:
+            self.recommendation_cache.invalidate(user_id)
+            self._member_score_cache.invalidate(user_id)
+    
+    @staticmethod
+    def _round_scores(scores):
+        """Round joint/member scores to 2 decimals, one rule for single values and arrays"""
+        rounded = np.round(scores, 2)
+        return float(rounded) if np.ndim(rounded) == 0 else rounded
+    
+    def _combine_couple_recommendations(self, recs1: List[Dict], recs2: List[Dict], method: str) -> List[Dict]:
+        """
+        Merge two individual recommendation lists with a couple method
+        
+        Args:
+            recs1 (List[Dict]): First user's individual recommendations
+            recs2 (List[Dict]): Second user's individual recommendations
+            method (str): Recommendation method ('intersection', 'weighted', 'least_misery', 'hybrid')
+            
+        Returns:
+            List[Dict]: All joint recommendations, best first
+        """
         # Convert to dictionaries for easier lookup
         recs1_dict = {rec['movie_id']: rec for rec in recs1}
         recs2_dict = {rec['movie_id']: rec for rec in recs2}
@@ -288,7 +2005,7 @@ class JointMovieRecommender:
                 
                 joint_recommendations.append({
                     **rec1,
-                    'joint_score': round(joint_score, 2),
+                    'joint_score': self._round_scores(joint_score),
                     'user1_score': rec1['predicted_rating'],
                     'user2_score': rec2['predicted_rating'],
                     'method': 'intersection',
@@ -309,9 +2026,9 @@ class JointMovieRecommender:
                     movie_info = recs1_dict.get(movie_id) or recs2_dict.get(movie_id)
                     joint_recommendations.append({
                         **movie_info,
-                        'joint_score': round(joint_score, 2),
-                        'user1_score': round(score1, 2),
-                        'user2_score': round(score2, 2),
+                        'joint_score': self._round_scores(joint_score),
+                        'user1_score': self._round_scores(score1),
+                        'user2_score': self._round_scores(score2),
                         'method': 'weighted',
                         'explanation': f"Balanced choice for both: {score1:.1f} & {score2:.1f}"
                     })
@@ -330,17 +2047,17 @@ class JointMovieRecommender:
                     movie_info = recs1_dict.get(movie_id) or recs2_dict.get(movie_id)
                     joint_recommendations.append({
                         **movie_info,
-                        'joint_score': round(joint_score, 2),
-                        'user1_score': round(score1, 2),
-                        'user2_score': round(score2, 2),
+                        'joint_score': self._round_scores(joint_score),
+                        'user1_score': self._round_scores(score1),
+                        'user2_score': self._round_scores(score2),
                         'method': 'least_misery',
                         'explanation': f"Safe choice - ensures no one dislikes it! ({score1:.1f}, {score2:.1f})"
                     })
         
         elif method == 'hybrid':
             # Combine multiple methods with different weights
-            intersection_recs = self.recommend_for_couple(user1_id, user2_id, 'intersection', 50)
-            weighted_recs = self.recommend_for_couple(user1_id, user2_id, 'weighted', 50)
+            intersection_recs = self._combine_couple_recommendations(recs1, recs2, 'intersection')[:self.INDIVIDUAL_CANDIDATES]
+            weighted_recs = self._combine_couple_recommendations(recs1, recs2, 'weighted')[:self.INDIVIDUAL_CANDIDATES]
             
             # Create hybrid scoring
             all_hybrid_movies = {}
@@ -365,14 +2082,409 @@ class JointMovieRecommender:
                     }
             
             joint_recommendations = list(all_hybrid_movies.values())
-            joint_recommendations.sort(key=lambda x: x.get('hybrid_score', x['joint_score']), reverse=True)
+            joint_recommendations.sort(key=lambda x: (-x['hybrid_score'], x['movie_id']))
         
-        # Sort and return top recommendations
+        # Sort recommendations, best first (ties by movie_id, as in recommend_for_couples)
         if method != 'hybrid':
-            joint_recommendations.sort(key=lambda x: x['joint_score'], reverse=True)
+            joint_recommendations.sort(key=lambda x: (-x['joint_score'], x['movie_id']))
         
-        return joint_recommendations[:n_recommendations]
+        return joint_recommendations
+    
+    @_instrumented
+    def recommend_for_couples(self, pairs: List[Tuple[int, int]], method: str = 'hybrid',
+                              n_recommendations: int = 15) -> pd.DataFrame:
+        """
+        Generate joint recommendations for many couples in one call
+        
+        Same methods and scores as recommend_for_couple, but every distinct user
+        is scored once and the aggregation runs over all couples as frame operations.
+        
+        Args:
+            pairs (List[Tuple[int, int]]): (user1_id, user2_id) pairs
+            method (str): Recommendation method ('intersection', 'weighted', 'least_misery', 'hybrid')
+            n_recommendations (int): Number of recommendations per couple
+            
+        Returns:
+            pd.DataFrame: One row per recommendation (user1_id, user2_id, rank, movie_id, title,
+                genres, year, joint_score, user1_score, user2_score, method[, hybrid_score])
+        """
+        pairs = [tuple(pair) for pair in pairs]
+        if any(len(pair) != 2 for pair in pairs):
+            raise ValueError("Every pair must contain exactly two user IDs")
+        
+        results = self._recommend_for_groups_batch(pairs, method, n_recommendations, member_scores=True)
+        pair_users = np.array(pairs, dtype=np.int64).reshape(-1, 2)[results['group'].to_numpy(dtype=np.int64)]
+        results.insert(0, 'user1_id', pair_users[:, 0])
+        results.insert(1, 'user2_id', pair_users[:, 1])
+        return results.drop(columns=['group', 'member_count'])
+    
+    @_instrumented
+    def recommend_for_groups(self, groups: List[List[int]], method: str = 'hybrid',
+                             n_recommendations: int = 15) -> pd.DataFrame:
+        """
+        Generate joint recommendations for many groups in one call
+        
+        The couple methods generalized to any group size: 'intersection' keeps
+        movies in every member's list, 'weighted' averages member scores and
+        'least_misery' takes the lowest (members without the movie count as 2.5),
+        'hybrid' boosts intersection movies and fills with weighted ones.
+        
+        Args:
+            groups (List[List[int]]): Lists of user IDs
+            method (str): Recommendation method ('intersection', 'weighted', 'least_misery', 'hybrid')
+            n_recommendations (int): Number of recommendations per group
+            
+        Returns:
+            pd.DataFrame: One row per recommendation (group, rank, movie_id, title, genres, year,
+                joint_score, member_count, method[, hybrid_score]); group is the position in groups
+        """
+        return self._recommend_for_groups_batch([tuple(group) for group in groups], method, n_recommendations)
     
+    def _recommend_for_groups_batch(self, groups: List[Tuple], method: str, n_recommendations: int,
+                                    member_scores: bool = False) -> pd.DataFrame:
+        """Shared implementation of recommend_for_couples / recommend_for_groups"""
+        if method not in self.COUPLE_METHODS:
+            raise ValueError(f"Unknown method '{method}', expected one of {self.COUPLE_METHODS}")
+        
+        sizes = np.array([len(group) for group in groups], dtype=np.int64)
+        members = pd.DataFrame({
+            'group': np.repeat(np.arange(len(groups)), sizes),
+            'member': np.concatenate([np.arange(size) for size in sizes]) if len(groups) else [],
+            'user_id': np.fromiter((user_id for group in groups for user_id in group), dtype=np.int64)
+        })
+        candidates = self._individual_candidates_batch(members['user_id'].unique(), self.INDIVIDUAL_CANDIDATES)
+        
+        # Like recommend_for_couple, groups where a member has no recommendations get none
+        complete = members['user_id'].isin(candidates['user_id']).groupby(members['group']).transform('all')
+        scores = members[complete].merge(candidates, on='user_id')
+        
+        aggregation_start = time.perf_counter()
+        keys = ['group', 'col']
+        joint = scores.groupby(keys, sort=False)['predicted_rating'].agg(
+            member_count='count', score_sum='sum', score_min='min'
+        ).reset_index()
+        joint['movie_id'] = self.movie_index.ids[joint['col'].to_numpy()]
+        size = sizes[joint['group'].to_numpy()]
+        missing = size - joint['member_count'].to_numpy()
+        
+        def intersection():
+            frame = joint[missing == 0]
+            return frame.assign(joint_score=self._round_scores(frame['score_sum'] / size[missing == 0]))
+        
+        def weighted():
+            frame = joint.assign(joint_score=(joint['score_sum'] + 2.5 * missing) / size)
+            return frame[frame['joint_score'] >= 3.5].assign(joint_score=lambda f: self._round_scores(f['joint_score']))
+        
+        def least_misery():
+            lowest = np.where(missing > 0, np.minimum(joint['score_min'], 2.5), joint['score_min'])
+            frame = joint.assign(joint_score=lowest)
+            return frame[frame['joint_score'] >= 3.5].assign(joint_score=lambda f: self._round_scores(f['joint_score']))
+        
+        def top(frame, score, n):
+            frame = frame.sort_values(['group', score, 'movie_id'], ascending=[True, False, True], kind='stable')
+            return frame[frame.groupby('group').cumcount() < n]
+        
+        if method == 'hybrid':
+            intersection_recs = top(intersection(), 'joint_score', self.INDIVIDUAL_CANDIDATES)
+            intersection_recs = intersection_recs.assign(
+                hybrid_score=intersection_recs['joint_score'] * 1.2, method='hybrid_intersection'
+            )
+            weighted_recs = top(weighted(), 'joint_score', self.INDIVIDUAL_CANDIDATES)
+            weighted_recs = weighted_recs.merge(intersection_recs[keys], on=keys, how='left', indicator=True)
+            weighted_recs = weighted_recs[weighted_recs['_merge'] == 'left_only'].drop(columns='_merge')
+            weighted_recs = weighted_recs.assign(hybrid_score=weighted_recs['joint_score'], method='hybrid_weighted')
+            results = top(pd.concat([intersection_recs, weighted_recs], ignore_index=True),
+                          'hybrid_score', n_recommendations)
+        else:
+            aggregate = {'intersection': intersection, 'weighted': weighted, 'least_misery': least_misery}[method]
+            results = top(aggregate().assign(method=method), 'joint_score', n_recommendations)
+        
+        results = results.reset_index(drop=True)
+        results['rank'] = results.groupby('group').cumcount() + 1
+        self.instrumentation.record_time('aggregation_strategy', time.perf_counter() - aggregation_start)
+        
+        if member_scores:
+            # Per-member scores (2.5 when the movie is not in that member's list)
+            wide = scores.set_index(keys + ['member'])['predicted_rating'].unstack('member')
+            wide = wide.reindex(index=pd.MultiIndex.from_frame(results[keys]),
+                                columns=range(int(sizes.max(initial=0)))).fillna(2.5)
+            for member in wide.columns:
+                results[f'user{member + 1}_score'] = self._round_scores(wide[member].to_numpy())
+        
+        movie_info = pd.DataFrame(self._movie_records(results['col'].to_numpy()))
+        columns = ['group', 'rank', 'movie_id', 'title', 'genres', 'year', 'joint_score', 'member_count']
+        columns += [column for column in results.columns if column.startswith('user')]
+        columns += ['method'] + (['hybrid_score'] if method == 'hybrid' else [])
+        results = pd.concat([results.drop(columns=['col', 'movie_id']), movie_info], axis=1)
+        return results[columns] if len(results) else pd.DataFrame(columns=columns)
+    
+    def _individual_candidates_batch(self, user_ids: np.ndarray, n_recommendations: int) -> pd.DataFrame:
+        """
+        Top individual candidates for many users, scored with blocked sparse products
+        
+        Args:
+            user_ids (np.ndarray): User IDs, unknown users are skipped
+            n_recommendations (int): Candidates kept per user
+            
+        Returns:
+            pd.DataFrame: Long frame (user_id, col, predicted_rating, confidence), best first per user
+        """
+        user_ids = np.asarray(user_ids, dtype=np.int64)
+        rows = self.user_index.lookup(user_ids)
+        user_ids, rows = user_ids[rows >= 0], rows[rows >= 0]
+        
+        n_jobs = _resolve_n_jobs(self.n_jobs)
+        chunk = max(self.PARALLEL_MIN_USERS, -(-len(user_ids) // n_jobs))
+        if n_jobs > 1 and len(user_ids) > chunk:
+            # Users are scored independently, so chunks run on workers and concatenate in order
+            chunks = [user_ids[start:start + chunk] for start in range(0, len(user_ids), chunk)]
+            results = list(self._worker_pool(n_jobs).map(
+                _candidates_worker, chunks, [n_recommendations] * len(chunks)))
+            for _, counters in results:
+                for name, value in counters.items():
+                    self.instrumentation.increment(name, value)
+            return pd.concat([candidates for candidates, _ in results], ignore_index=True)
+        
+        parts = []
+        for start, row, col, predicted, confidence in self._score_blocks(rows):
+            # Best n per user: sort by (user, -score, movie) and rank within each user
+            order = np.lexsort((col, -predicted, row))
+            row, col, confidence, predicted = row[order], col[order], confidence[order], predicted[order]
+            rank = np.arange(len(row)) - np.searchsorted(row, row)
+            top = rank < n_recommendations
+            parts.append(pd.DataFrame({
+                'user_id': user_ids[start + row[top]],
+                'col': col[top],
+                'predicted_rating': predicted[top],
+                'confidence': np.round(confidence[top], 2)
+            }))
+        
+        if not parts:
+            return pd.DataFrame({'user_id': np.array([], dtype=np.int64), 'col': np.array([], dtype=np.int64),
+                                 'predicted_rating': np.array([]), 'confidence': np.array([])})
+        return pd.concat(parts, ignore_index=True)
+    
+    def _score_blocks(self, rows: np.ndarray):
+        """
+        Score all candidate movies for many users, one block of users at a time
+        
+        Each block is scored by the engine's blocked kernel, which matches
+        _score_candidates user for user, and then blended with content-based
+        candidates where content_weight or a cold-start user calls for it.
+        
+        Args:
+            rows (np.ndarray): Matrix rows of the users
+            
+        Yields:
+            Tuple: (block start, row within block, candidate column, predicted score rounded
+                to 2 decimals, confidence) with one entry per candidate
+        """
+        block_size = self.neighbour_index.block_size
+        if self.engine == 'content':
+            for start in range(0, len(rows), block_size):
+                with self.instrumentation.timer('candidate_aggregation'):
+                    row, col, predicted, confidence = self._content_scores(rows[start:start + block_size])
+                self.instrumentation.increment('candidates_considered', len(col))
+                yield start, row, col, self._round_scores(predicted.astype(np.float64)), confidence
+            return
+        
+        # Engine scorers report their aggregation time so each block records the stage once
+        collaborative = self._score_blocks_factors(rows) if self.engine == 'nmf' else self._score_blocks_knn(rows)
+        for start, row, col, predicted, confidence, elapsed in collaborative:
+            blend_start = time.perf_counter()
+            row, col, predicted, confidence = self._with_content(
+                rows[start:start + block_size], row, col, predicted, confidence)
+            self.instrumentation.record_time('candidate_aggregation', elapsed + time.perf_counter() - blend_start)
+            self.instrumentation.increment('candidates_considered', len(col))
+            yield start, row, col, self._round_scores(predicted.astype(np.float64)), confidence
+    
+    def _score_blocks_knn(self, rows: np.ndarray):
+        """
+        Blocked similar-user scoring (engine='knn'), see _score_blocks
+        
+        Each block is turned into a sparse users x users matrix of neighbour
+        similarities and multiplied with the liked-ratings matrix, which yields
+        the same weighted sums and recommender counts as _aggregate_neighbour_ratings.
+        Each tuple ends with the block's aggregation time in seconds.
+        """
+        ratings = self.user_movie_matrix
+        liked = ratings.multiply(ratings >= self.LIKED_RATING).tocsr()
+        liked_binary = liked.copy()
+        liked_binary.data[:] = 1
+        n_movies = ratings.shape[1]
+        
+        for start in range(0, len(rows), self.neighbour_index.block_size):
+            block_rows = rows[start:start + self.neighbour_index.block_size]
+            with self.instrumentation.timer('neighbour_search'):
+                neighbours = self.neighbour_index.query_batch(block_rows, self.n_neighbours)
+            aggregation_start = time.perf_counter()
+            lengths = np.array([len(found) for found, _ in neighbours])
+            indptr = np.concatenate([[0], np.cumsum(lengths)])
+            indices = np.concatenate([found for found, _ in neighbours]) if lengths.sum() else np.array([], dtype=np.int64)
+            similarities = np.concatenate([sims for _, sims in neighbours]) if lengths.sum() else np.array([])
+            weights = sparse.csr_matrix((similarities.astype(np.float64), indices, indptr),
+                                        shape=(len(block_rows), ratings.shape[0]))
+            
+            weighted_sums = (weights @ liked).tocsr()
+            weights.data[:] = 1
+            counts = (weights @ liked_binary).tocsr()
+            weighted_sums.sort_indices()
+            counts.sort_indices()
+            
+            row = np.repeat(np.arange(len(block_rows)), np.diff(counts.indptr))
+            col = counts.indices
+            
+            # Drop movies the user already rated, movies without metadata and weak support
+            rated = ratings[block_rows]
+            rated_keys = np.repeat(np.arange(len(block_rows)), np.diff(rated.indptr)) * n_movies + rated.indices
+            keep = (~np.isin(row * n_movies + col, rated_keys)
+                    & (counts.data >= self.MIN_RECOMMENDERS)
+                    & (self.movie_metadata_rows[col] >= 0))
+            support = counts.data[keep]
+            predicted = np.round(weighted_sums.data[keep] / support, 2)
+            yield (start, row[keep], col[keep], predicted, support / self.n_neighbours,
+                   time.perf_counter() - aggregation_start)
+    
+    def _score_blocks_factors(self, rows: np.ndarray):
+        """
+        Blocked latent-factor scoring (engine='nmf'), see _score_blocks
+        
+        A block of user factors times the item factors gives every score at once;
+        only the FACTOR_CANDIDATE_POOL best unseen movies per user are yielded,
+        each tuple ending with the block's aggregation time in seconds.
+        """
+        n_movies = self.user_movie_matrix.shape[1]
+        pool = min(self.FACTOR_CANDIDATE_POOL, n_movies)
+        item_norms = np.linalg.norm(self.item_factors, axis=0)
+        no_metadata = self.movie_metadata_rows < 0
+        
+        for start in range(0, len(rows), self.neighbour_index.block_size):
+            aggregation_start = time.perf_counter()
+            block_rows = rows[start:start + self.neighbour_index.block_size]
+            user_factors = self.user_factors[block_rows]
+            scores = user_factors @ self.item_factors
+            rated = self.user_movie_matrix[block_rows]
+            scores[np.repeat(np.arange(len(block_rows)), np.diff(rated.indptr)), rated.indices] = 0
+            scores[:, no_metadata] = 0
+            
+            top = np.argpartition(-scores, pool - 1, axis=1)[:, :pool]
+            top_scores = np.take_along_axis(scores, top, axis=1)
+            row, position = np.nonzero(top_scores > 0)
+            col = top[row, position]
+            values = top_scores[row, position]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                confidence = values / (np.linalg.norm(user_factors, axis=1)[row] * item_norms[col])
+            yield (start, row, col, np.clip(values, 0, 5), confidence,
+                   time.perf_counter() - aggregation_start)
+    
+    @_instrumented
+    def recommend_for_group(self, user_ids: List[int], strategy: str = 'average',
+                            n_recommendations: int = 15, weights: Optional[Dict[int, float]] = None,
+                            diversity: float = 0.0) -> List[Dict]:
+        """
+        Generate joint recommendations for a group of any size
+        
+        Every member is scored over the whole candidate set in one blocked pass,
+        giving a members x candidates matrix (0 where no similar user of that
+        member backs the movie; with engine='nmf' the matrix is member factors
+        times candidate item factors) that each strategy reduces column-wise.
+        
+        Args:
+            user_ids (List[int]): Group member user IDs
+            strategy (str): Aggregation ('average', 'least_misery', 'most_pleasure', 'weighted', 'borda')
+            n_recommendations (int): Number of recommendations
+            weights (Optional[Dict[int, float]]): Member weights for the 'weighted' strategy (default equal)
+            diversity (float): 0 ranks by score alone, up to 1 trades score for genre/decade
+                variety among the DIVERSITY_CANDIDATE_POOL best movies (see _diversify)
+            
+        Returns:
+            List[Dict]: Group recommendations with per-member scores and explanations
+        """
+        if strategy not in self.GROUP_STRATEGIES:
+            raise ValueError(f"Unknown strategy '{strategy}', expected one of {self.GROUP_STRATEGIES}")
+        
+        user_ids = list(dict.fromkeys(user_ids))
+        rows = self.user_index.lookup(user_ids)
+        members = [user_id for user_id, row in zip(user_ids, rows) if row >= 0]
+        rows = rows[rows >= 0]
+        if not members:
+            return []
+        
+        # Members x candidates score matrix
+        member_rows, cols, scores = [], [], []
+        for start, row, col, predicted, _ in self._score_blocks(rows):
+            member_rows.append(start + row)
+            cols.append(col)
+            scores.append(predicted)
+        candidates, candidate_pos = np.unique(np.concatenate(cols), return_inverse=True)
+        if not len(candidates):
+            return []
+        if self.engine == 'nmf':
+            # Latent factors predict every member's score for every candidate they have not seen
+            score_matrix = np.round(np.clip(self.user_factors[rows] @ self.item_factors[:, candidates], 0, 5), 2)
+            predicted = self.user_movie_matrix[rows][:, candidates].toarray() == 0
+            score_matrix[~predicted] = 0
+        else:
+            score_matrix = np.zeros((len(members), len(candidates)))
+            predicted = np.zeros_like(score_matrix, dtype=bool)
+            score_matrix[np.concatenate(member_rows), candidate_pos] = np.concatenate(scores)
+            predicted[np.concatenate(member_rows), candidate_pos] = True
+        
+        with self.instrumentation.timer('aggregation_strategy'):
+            group_scores = self._aggregate_group_scores(score_matrix, strategy, members, weights)
+        # Ties (e.g. least misery when no movie is backed for everyone) go to the better average
+        top = np.lexsort((candidates, -score_matrix.mean(axis=0), -np.round(group_scores, 4)))
+        if diversity:
+            top = top[:self.DIVERSITY_CANDIDATE_POOL]
+            top = top[self._diversify(candidates[top], group_scores[top], n_recommendations, diversity)]
+        else:
+            top = top[:n_recommendations]
+        
+        group_recommendations = []
+        for movie_info, position in zip(self._movie_records(candidates[top]), top):
+            member_scores = {
+                user_id: round(float(score), 2) for user_id, score in zip(members, score_matrix[:, position])
+            }
+            group_recommendations.append({
+                **movie_info,
+                'group_score': round(float(group_scores[position]), 3),
+                'member_scores': member_scores,
+                'members_predicted': int(predicted[:, position].sum()),
+                'strategy': strategy,
+                'explanation': self._group_strategy_explanation(strategy, member_scores)
+            })
+        return group_recommendations
+    
+    def _aggregate_group_scores(self, score_matrix: np.ndarray, strategy: str,
+                                members: List[int], weights: Optional[Dict[int, float]] = None) -> np.ndarray:
+        """Reduce a members x candidates score matrix to one score per candidate"""
+        if strategy == 'average':
+            return score_matrix.mean(axis=0)
+        if strategy == 'least_misery':
+            return score_matrix.min(axis=0)
+        if strategy == 'most_pleasure':
+            return score_matrix.max(axis=0)
+        if strategy == 'weighted':
+            member_weights = np.array([(weights or {}).get(user_id, 1.0) for user_id in members], dtype=np.float64)
+            if member_weights.sum() <= 0:
+                raise ValueError("Member weights must sum to a positive value")
+            return member_weights @ score_matrix / member_weights.sum()
+        # Borda count: each member gives a candidate one point per candidate it beats (ties split)
+        ranks = rankdata(score_matrix, axis=1)
+        return (ranks - 1).sum(axis=0)
+    
+    def _group_strategy_explanation(self, strategy: str, member_scores: Dict[int, float]) -> str:
+        """Short explanation of a group recommendation"""
+        scores = ', '.join(f"{score:.1f}" for score in member_scores.values())
+        if strategy == 'least_misery':
+            return f"Safe choice - nobody in the group should dislike it! ({scores})"
+        if strategy == 'most_pleasure':
+            return f"Someone in the group will love this! ({scores})"
+        if strategy == 'borda':
+            return f"Ranks highly across everyone's lists ({scores})"
+        return f"Balanced choice for the whole group: {scores}"
+    
+    @_instrumented
     def analyze_group_preferences(self, user_ids: List[int]) -> Dict:
         """
         Analyze preferences and compatibility for a group of users
@@ -387,11 +2499,8 @@ class JointMovieRecommender:
             return {"error": "Need at least 2 users for group analysis"}
         
         # Get individual profiles
-        profiles = {}
-        for user_id in user_ids:
-            profile = self.get_user_profile(user_id)
-            if 'error' not in profile:
-                profiles[user_id] = profile
+        profiles = {user_id: profile for user_id, profile in self.get_user_profiles(user_ids).items()
+                    if 'error' not in profile}
         
         if len(profiles) < 2:
             return {"error": "Not enough valid user profiles"}
@@ -409,14 +2518,18 @@ class JointMovieRecommender:
         # Find common genres
         common_genres = set.intersection(*user_genres.values()) if user_genres else set()
         
-        # Calculate pairwise similarities
+        # Calculate pairwise similarities for all pairs at once
+        compatibility = self.calculate_group_compatibility([user_id for user_id in user_ids if user_id in profiles])
         similarities = {}
-        for i, user1 in enumerate(user_ids):
-            for user2 in user_ids[i+1:]:
-                if user1 in profiles and user2 in profiles:
-                    sim = self.calculate_user_similarity(user1, user2)
-                    if 'error' not in sim:
-                        similarities[f"{user1}-{user2}"] = sim
+        for pair in compatibility.itertuples(index=False):
+            similarities[f"{pair.user1_id}-{pair.user2_id}"] = {
+                'cosine_similarity': pair.cosine_similarity,
+                'pearson_correlation': pair.pearson_correlation,
+                'common_movies_count': pair.common_movies_count,
+                'avg_rating_difference': pair.avg_rating_difference,
+                'similarity_level': self._classify_similarity(pair.cosine_similarity),
+                'compatibility_score': pair.compatibility_score
+            }
         
         # Group compatibility score
         if similarities:
@@ -446,6 +2559,7 @@ class JointMovieRecommender:
         else:
             return "least_misery - Low compatibility, avoid movies anyone would dislike"
     
+    @_instrumented
     def get_recommendation_explanation(self, movie_id: int, user_ids: List[int]) -> Dict:
         """
         Provide detailed explanation for why a movie was recommended to a group
@@ -457,53 +2571,137 @@ class JointMovieRecommender:
         Returns:
             Dict: Detailed explanation of the recommendation
         """
-        movie_info = self.movies_df[self.movies_df['movie_id'] == movie_id]
-        if movie_info.empty:
-            return {"error": "Movie not found"}
-        
-        movie_info = movie_info.iloc[0]
+        return self.explain_recommendations([movie_id], user_ids)[movie_id]
+    
+    @_instrumented
+    def explain_recommendations(self, movie_ids: List[int], user_ids: List[int]) -> Dict[int, Dict]:
+        """
+        Explain a whole recommended list for a group at once
         
-        explanation = {
-            'movie_title': movie_info['title'],
-            'genres': movie_info['genres'],
-            'year': movie_info['year'],
-            'individual_predictions': {},
-            'group_factors': []
-        }
+        Each member's candidates are scored once (one neighbour search) and every
+        listed movie's predicted rating is read off those scores, so movies
+        outside the member's own top list are explained too. Member scores are
+        cached per model version and shared with recommend_for_individual, so
+        explaining a couple list right after computing it costs no scoring at
+        all. Favourite genres of all members come from one sparse product.
         
-        # Get individual predictions
-        for user_id in user_ids:
-            user_recs = self.recommend_for_individual(user_id, 100)
-            movie_rec = next((rec for rec in user_recs if rec['movie_id'] == movie_id), None)
+        Args:
+            movie_ids (List[int]): Movies to explain, e.g. the IDs of a couple or group list
+            user_ids (List[int]): Group members
             
-            if movie_rec:
-                explanation['individual_predictions'][user_id] = {
-                    'predicted_rating': movie_rec['predicted_rating'],
-                    'confidence': movie_rec['confidence'],
-                    'reason': movie_rec['recommendation_reason']
-                }
-            else:
-                explanation['individual_predictions'][user_id] = {
-                    'predicted_rating': 'Not in top recommendations',
-                    'confidence': 0,
-                    'reason': 'This movie was not individually recommended for this user'
-                }
+        Returns:
+            Dict[int, Dict]: Explanation per movie ID (title, genres, year, individual_predictions,
+                group_factors), {"error": "Movie not found"} for unknown movies
+        """
+        explanations = {movie_id: {"error": "Movie not found"} for movie_id in movie_ids}
+        known_movies = [movie_id for movie_id in explanations if movie_id in self.movie_metadata.index]
+        if not known_movies:
+            return explanations
         
-        # Analyze why it's good for the group
-        movie_genres = set(movie_info['genres'].split('|')) if pd.notna(movie_info['genres']) else set()
+        metadata = self.movie_metadata.loc[known_movies]
+        for movie_id, title, genres, year in zip(known_movies, metadata['title'].tolist(),
+                                                 metadata['genres'].tolist(), metadata['year'].tolist()):
+            explanations[movie_id] = {
+                'movie_title': title,
+                'genres': genres,
+                'year': year,
+                'individual_predictions': {},
+                'group_factors': []
+            }
         
-        # Check genre preferences
-        for user_id in user_ids:
-            profile = self.get_user_profile(user_id)
-            if 'favorite_genres' in profile:
-                user_fav_genres = set(profile['favorite_genres'].keys())
-                genre_overlap = movie_genres & user_fav_genres
+        # Individual predictions, read from each member's candidate scores
+        cols = self.movie_index.lookup(known_movies)
+        rows = self.user_index.lookup(user_ids)
+        for user_id, row in zip(user_ids, rows):
+            predictions = self._member_predictions(user_id, row, cols)
+            for movie_id, prediction in zip(known_movies, predictions):
+                explanations[movie_id]['individual_predictions'][user_id] = prediction
+        
+        # Analyze why each movie is good for the group
+        known = [(user_id, row) for user_id, row in zip(user_ids, rows) if row >= 0]
+        favorites = []
+        if known:
+            genre_sums, genre_counts = self._genre_aggregates([row for _, row in known])
+            for (user_id, _), sums, counts in zip(known, genre_sums, genre_counts):
+                if counts.sum() > 0:
+                    favorites.append((user_id, {str(self.genre_names[genre])
+                                                for genre in self._favorite_genres(sums, counts)}))
+        for movie_id in known_movies:
+            explanation = explanations[movie_id]
+            movie_genres = explanation['genres'].split('|') if pd.notna(explanation['genres']) else []
+            for user_id, user_fav_genres in favorites:
+                genre_overlap = [genre for genre in movie_genres if genre in user_fav_genres]
                 if genre_overlap:
                     explanation['group_factors'].append(
                         f"User {user_id} likes {', '.join(genre_overlap)} genre(s)"
                     )
         
-        return explanation
+        return explanations
+    
+    def _member_predictions(self, user_id: int, row: int, cols: np.ndarray) -> List[Dict]:
+        """One member's predicted rating, confidence and reason for each rating matrix column"""
+        not_predicted = {
+            'predicted_rating': 'Not predicted',
+            'confidence': 0,
+            'reason': 'Not enough similar ratings to predict this movie for this user'
+        }
+        if row < 0:
+            return [dict(not_predicted) for _ in cols]
+        
+        candidate_cols, predicted, confidence = self._member_scores(user_id, row)
+        positions = np.minimum(np.searchsorted(candidate_cols, cols), max(len(candidate_cols) - 1, 0))
+        found = np.zeros(len(cols), dtype=bool)
+        if len(candidate_cols):
+            found = (cols >= 0) & (candidate_cols[positions] == cols)
+        start, end = self.user_movie_matrix.indptr[row], self.user_movie_matrix.indptr[row + 1]
+        rated = dict(zip(self.user_movie_matrix.indices[start:end].tolist(),
+                         self.user_movie_matrix.data[start:end].tolist()))
+        
+        predictions = []
+        for col, position, is_candidate in zip(cols.tolist(), positions.tolist(), found.tolist()):
+            if is_candidate:
+                score = predicted[position]
+                predictions.append({
+                    'predicted_rating': round(float(score), 2),
+                    'confidence': round(float(confidence[position]), 2),
+                    'reason': self._recommendation_reason(score)
+                })
+            elif col in rated:
+                predictions.append({
+                    'predicted_rating': 'Already rated',
+                    'confidence': 0,
+                    'reason': f"Rated this {rated[col]:.1f}/5.0"
+                })
+            else:
+                predictions.append(dict(not_predicted))
+        return predictions
+
+# Process-pool workers, each holding a memory-mapped copy of the model (see JointMovieRecommender._worker_pool)
+_WORKER_MODEL: Optional[JointMovieRecommender] = None
+
+def _init_worker(snapshot_path: str):
+    global _WORKER_MODEL
+    _WORKER_MODEL = JointMovieRecommender.load(snapshot_path, mmap=True)
+    _WORKER_MODEL.n_jobs = None  # Workers never start pools of their own
+
+def _candidates_worker(user_ids: np.ndarray, n_recommendations: int) -> Tuple[pd.DataFrame, Dict[str, int]]:
+    """_individual_candidates_batch on a worker, with the counters it incremented"""
+    _WORKER_MODEL.instrumentation.reset()
+    candidates = _WORKER_MODEL._individual_candidates_batch(user_ids, n_recommendations)
+    return candidates, dict(_WORKER_MODEL.instrumentation.counters)
+
+def _item_similarity_worker(path: str, entries: Dict, start: int, chunk: int, k: int,
+                            block_size: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """_top_similar_items over rows start:start + chunk of memory-mapped features"""
+    arrays = _load_snapshot_arrays(path, entries, mmap=True)
+    features = arrays['features']
+    return _top_similar_items(features, arrays['features_t'], start, min(start + chunk, features.shape[0]),
+                              k, block_size)
+
+def _shutdown_workers(pool: ProcessPoolExecutor, scratch_dir: Optional[str]):
+    pool.shutdown(wait=True)
+    if scratch_dir is not None:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
 
 # Example usage and testing functions
 def main():
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The recommender modules import each other as top-level modules from src/
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+# Tests build their data with the benchmark generator
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
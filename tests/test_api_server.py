@@ -0,0 +1,41 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from api_server import CoupleBatcher
+
+
+class FakeRecommender:
+    """Records when each recommend_for_couples batch runs and which pairs it held"""
+
+    def __init__(self):
+        self.calls = []
+
+    def recommend_for_couples(self, pairs, method, n_recommendations):
+        self.calls.append((time.monotonic(), list(pairs)))
+        return pd.DataFrame({'user1_id': [pair[0] for pair in pairs], 'user2_id': [pair[1] for pair in pairs],
+                             'movie_id': [1] * len(pairs)})
+
+
+def test_full_batch_does_not_flush_next_batch_early():
+    recommender = FakeRecommender()
+    batch_window = 0.2
+
+    async def scenario():
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            batcher = CoupleBatcher(recommender, executor, batch_window=batch_window, max_batch=2)
+            # Two requests fill the batch and flush it at once, before its window ends
+            await asyncio.gather(batcher.submit(1, 2, 'hybrid', 5), batcher.submit(3, 4, 'hybrid', 5))
+            await asyncio.sleep(batch_window / 2)
+            submitted = time.monotonic()
+            records = await batcher.submit(5, 6, 'hybrid', 5)
+            return submitted, records, batcher.batches
+
+    submitted, records, batches = asyncio.run(scenario())
+    assert batches == 2
+    assert [pairs for _, pairs in recommender.calls] == [[(1, 2), (3, 4)], [(5, 6)]]
+    assert records == [{'user1_id': 5, 'user2_id': 6, 'movie_id': 1}]
+    # The single request waits its own full window, not the leftover timer of the first batch
+    assert recommender.calls[1][0] - submitted >= batch_window * 0.9
@@ -0,0 +1,26 @@
+import numpy as np
+
+from data_preprocessing import load_movies
+from joint_recommender import JointMovieRecommender
+
+
+def test_title_without_year_keeps_year_missing(tmp_path):
+    movies_path = tmp_path / 'movies.csv'
+    movies_path.write_text("movieId,title,genres\n"
+                           "1,Heat (1995),Action|Crime\n"
+                           "2,Cosmos,Documentary\n")
+    movies_df = load_movies(str(movies_path))
+    assert movies_df['year'].tolist()[0] == 1995
+    assert movies_df['year'].isna().tolist() == [False, True]
+
+    ratings = {
+        'user_id': np.array([1, 1, 2], dtype=np.int32),
+        'movie_id': np.array([1, 2, 2], dtype=np.int32),
+        'rating': np.array([4.0, 5.0, 3.0], dtype=np.float32),
+    }
+    recommender = JointMovieRecommender(ratings, movies_df, engine='content')
+    assert recommender.movie_features_matrix.shape[0] == 2
+    # Only the dated movie carries a decade term
+    features = recommender.movie_features_matrix.toarray()
+    assert (features[0] > 0).sum() == 3
+    assert (features[1] > 0).sum() == 1
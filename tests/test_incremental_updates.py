@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.data_generator import generate_dataset
+from joint_recommender import JointMovieRecommender
+
+
+@pytest.fixture(scope='module')
+def dataset():
+    ratings_df, movies_df = generate_dataset('1m', seed=11, n_ratings=20_000, n_users=300, n_movies=1_000)
+    # Later ratings: some users and movies are only rated there, the rest are new ratings of known ones
+    later = (ratings_df['user_id'].isin(ratings_df['user_id'].unique()[::10])
+             | ratings_df['movie_id'].isin(ratings_df['movie_id'].unique()[::20])
+             | (np.random.default_rng(0).random(len(ratings_df)) < 0.1))
+    return ratings_df[~later], ratings_df[later], movies_df
+
+
+def assert_same_model(updated, rebuilt):
+    """The updated recommender holds the rebuilt one's ratings and gives the same answers"""
+    rows = updated.user_index.lookup(rebuilt.user_index.ids)
+    cols = updated.movie_index.lookup(rebuilt.movie_index.ids)
+    assert (rows >= 0).all() and (cols >= 0).all()
+    assert updated.user_movie_matrix.nnz == rebuilt.user_movie_matrix.nnz
+    assert (updated.user_movie_matrix[rows][:, cols] != rebuilt.user_movie_matrix).nnz == 0
+    np.testing.assert_array_equal(updated.hour_activity[rows], rebuilt.hour_activity)
+    np.testing.assert_array_equal(updated.weekday_activity[rows], rebuilt.weekday_activity)
+    for user_id in rebuilt.user_index.ids[:40].tolist():
+        assert updated.recommend_for_individual(user_id, 10) == rebuilt.recommend_for_individual(user_id, 10)
+
+
+def test_add_ratings_matches_full_build(dataset):
+    earlier, later, movies_df = dataset
+    recommender = JointMovieRecommender(earlier, movies_df)
+    recommender.recommend_for_individual(int(earlier['user_id'].iloc[0]))  # Warm the caches first
+    update = recommender.add_ratings(later)
+    assert update['new_users'] > 0
+    assert_same_model(recommender, JointMovieRecommender(pd.concat([earlier, later]), movies_df))
+
+
+def test_remove_ratings_matches_full_build(dataset):
+    earlier, later, movies_df = dataset
+    ratings_df = pd.concat([earlier, later])
+    recommender = JointMovieRecommender(ratings_df, movies_df)
+    removed = later
+    assert recommender.remove_ratings(removed)['ratings_removed'] == len(removed)
+    assert_same_model(recommender, JointMovieRecommender(ratings_df.drop(removed.index), movies_df))
+
+
+def test_add_ratings_after_memory_mapped_load(dataset, tmp_path):
+    earlier, later, movies_df = dataset
+    JointMovieRecommender(earlier, movies_df).save(str(tmp_path / 'snapshot'))
+    recommender = JointMovieRecommender.load(str(tmp_path / 'snapshot'), mmap=True)
+    recommender.add_ratings(later)
+    assert_same_model(recommender, JointMovieRecommender(pd.concat([earlier, later]), movies_df))
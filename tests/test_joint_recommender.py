@@ -0,0 +1,26 @@
+import pytest
+
+from benchmarks.data_generator import generate_dataset
+from joint_recommender import JointMovieRecommender
+
+
+@pytest.fixture(scope='module')
+def dataset():
+    return generate_dataset('1m', seed=7, n_ratings=30_000, n_users=400, n_movies=1_500)
+
+
+@pytest.mark.parametrize('engine', ['knn', 'nmf', 'content'])
+@pytest.mark.parametrize('method', JointMovieRecommender.COUPLE_METHODS)
+def test_batch_couples_match_single_couples(dataset, engine, method):
+    ratings_df, movies_df = dataset
+    recommender = JointMovieRecommender(ratings_df, movies_df, engine=engine)
+    users = ratings_df['user_id'].unique()[:60]
+    pairs = list(zip(users[::2].tolist(), users[1::2].tolist()))
+
+    batch = recommender.recommend_for_couples(pairs, method, 10)
+    columns = ['movie_id', 'joint_score', 'user1_score', 'user2_score', 'method']
+    columns += ['hybrid_score'] if method == 'hybrid' else []
+    for user1_id, user2_id in pairs:
+        single = recommender.recommend_for_couple(user1_id, user2_id, method, 10)
+        rows = batch[(batch['user1_id'] == user1_id) & (batch['user2_id'] == user2_id)]
+        assert rows[columns].to_dict('records') == [{column: rec[column] for column in columns} for rec in single]